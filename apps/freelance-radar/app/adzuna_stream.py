@@ -0,0 +1,104 @@
+"""
+Incremental parser for Adzuna search responses.
+
+An Adzuna response is a single JSON object whose `results` array can hold
+hundreds of jobs. Rather than reading the whole body and building the full
+tree with `response.json()`, ResultStream consumes the body chunk by chunk and
+yields each job as soon as its object is complete, so only one job (plus the
+unparsed tail of the current chunk) is held in memory at a time. The other
+top-level keys (`count`, `mean`, ...) are collected into `meta`, whether they
+come before or after `results`.
+"""
+
+import codecs
+import json
+from typing import AsyncIterator
+
+DELIMITERS = " \t\r\n,:]}"
+
+
+class ResultStream:
+    """Yields the jobs of an Adzuna response from an async stream of bytes."""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self.chunks = chunks.__aiter__()
+        self.meta = {}
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    async def _fill(self) -> bool:
+        """Append the next chunk to the buffer, dropping what was consumed."""
+        if self._eof:
+            return False
+        try:
+            chunk = await self.chunks.__anext__()
+        except StopAsyncIteration:
+            self._eof = True
+            self._buf = self._buf[self._pos:] + self._utf8.decode(b"", final=True)
+            self._pos = 0
+            return False
+        self._buf = self._buf[self._pos:] + self._utf8.decode(chunk)
+        self._pos = 0
+        return True
+
+    async def _peek(self):
+        """Next non-whitespace character, or None at the end of the body."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not await self._fill():
+                return None
+
+    async def _expect(self, *chars: str) -> str:
+        char = await self._peek()
+        if char not in chars:
+            raise ValueError(f"Malformed Adzuna response: expected {' or '.join(chars)}, got {char!r}")
+        self._pos += 1
+        return char
+
+    async def _value(self):
+        """Decode the next complete JSON value, reading more of the body as needed."""
+        await self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # In valid JSON a value is always followed by a delimiter; anything
+                # else (or the end of the buffer) means a number was cut off by the
+                # chunk boundary and continues in the next chunk
+                if self._eof or (end < len(self._buf) and self._buf[end] in DELIMITERS):
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            await self._fill()
+
+    async def jobs(self) -> AsyncIterator[dict]:
+        """Yield each entry of `results`; other top-level keys end up in `meta`."""
+        await self._expect("{")
+        if await self._peek() == "}":
+            self._pos += 1
+            return
+
+        while True:
+            key = await self._value()
+            await self._expect(":")
+            if key == "results":
+                await self._expect("[")
+                if await self._peek() == "]":
+                    self._pos += 1
+                else:
+                    while True:
+                        yield await self._value()
+                        if await self._expect(",", "]") == "]":
+                            break
+            else:
+                self.meta[key] = await self._value()
+
+            if await self._expect(",", "}") == "}":
+                return
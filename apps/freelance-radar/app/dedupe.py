@@ -0,0 +1,89 @@
+"""
+Near-duplicate detection for job postings.
+
+The same position is often reposted under a new Adzuna id with the same or
+slightly edited text. Each posting gets a 64-bit SimHash of its normalized
+title, company and description; postings whose hashes differ in at most
+MAX_DISTANCE bits are treated as the same position.
+
+To find candidates without comparing against every stored job, the hash is
+split into BANDS 16-bit bands. Two hashes within MAX_DISTANCE bits of each
+other must agree exactly on at least one band (pigeonhole), so a lookup on
+the band values narrows the comparison down to a handful of rows.
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import List, Optional
+
+BANDS = 4
+BAND_BITS = 64 // BANDS
+MAX_DISTANCE = 3
+SHINGLE_SIZE = 3
+
+
+def normalize(text: Optional[str]) -> List[str]:
+    """Lowercase, strip accents and punctuation, and split into words.
+
+    Words are runs of Unicode letters and digits, so Cyrillic, Greek or CJK
+    postings keep their text (underscores separate words, as before).
+    """
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return re.findall(r"[^\W_]+", text)
+
+
+def _hash64(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+
+
+# What simhash() returned for postings without words before it returned None
+# (the hash of the empty string); see migration 8 in main.py
+LEGACY_EMPTY_HASH = _hash64("")
+
+
+def simhash(title: Optional[str], company: Optional[str], description: Optional[str]) -> Optional[int]:
+    """Unsigned 64-bit SimHash over word shingles of a posting.
+
+    None for a posting without any words: there is nothing to compare, and
+    all of them would otherwise share the hash of the empty string.
+    """
+    words = normalize(title) + normalize(company) + normalize(description)
+    if not words:
+        return None
+    if len(words) >= SHINGLE_SIZE:
+        features = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+    else:
+        features = [" ".join(words)]
+
+    weights = [0] * 64
+    for feature in features:
+        h = _hash64(feature)
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def bands(h: int) -> List[int]:
+    """Band keys of a hash, tagged with their position so they are comparable across bands."""
+    mask = (1 << BAND_BITS) - 1
+    return [(i << BAND_BITS) | (h >> (i * BAND_BITS) & mask) for i in range(BANDS)]
+
+
+def distance(a: int, b: int) -> int:
+    """Hamming distance between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+def to_signed(h: int) -> int:
+    """Store an unsigned 64-bit hash in a Postgres BIGINT."""
+    return h - (1 << 64) if h >= 1 << 63 else h
+
+
+def to_unsigned(h: int) -> int:
+    """Inverse of to_signed."""
+    return h & ((1 << 64) - 1)
@@ -1,12 +1,33 @@
-from fastapi import FastAPI, HTTPException, Query
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import List, Optional
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.errors import UndefinedTable
+from psycopg2.pool import ThreadedConnectionPool
+from collections import OrderedDict
+from contextlib import contextmanager
 import os
 import httpx
 from datetime import datetime
+import base64
+import csv
+import io
 import json
+import asyncio
+import math
+import random
+import threading
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+import adzuna_stream
+import dedupe
+import metrics
+import prepared
+import salary
 
 app = FastAPI(title="Freelance Radar", version="1.0.0")
 
@@ -14,6 +35,37 @@ ADZUNA_APP_ID = os.getenv("ADZUNA_APP_ID")
 ADZUNA_API_KEY = os.getenv("ADZUNA_API_KEY")
 ADZUNA_BASE_URL = "https://api.adzuna.com/v1/api/jobs"
 
+# Adzuna's free tier allows 25 hits per minute; stay under it by default
+ADZUNA_RATE_PER_MINUTE = float(os.getenv("ADZUNA_RATE_PER_MINUTE", "20"))
+ADZUNA_BURST = int(os.getenv("ADZUNA_BURST", "5"))
+
+# Background refresh of saved searches (0 disables the scheduler)
+REFRESH_INTERVAL_MINUTES = float(os.getenv("REFRESH_INTERVAL_MINUTES", "0"))
+REFRESH_JITTER = float(os.getenv("REFRESH_JITTER", "0.3"))
+REFRESH_MAX_SEARCHES = int(os.getenv("REFRESH_MAX_SEARCHES", "10"))
+
+# Jobs parsed from a streamed Adzuna response per bulk insert
+INSERT_BATCH_SIZE = int(os.getenv("INSERT_BATCH_SIZE", "100"))
+
+# Ingestion queue workers per process, and how long a claimed task stays
+# leased to its worker before another replica may pick it up again
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_POLL_SECONDS = float(os.getenv("INGEST_POLL_SECONDS", "2"))
+INGEST_LEASE_SECONDS = int(os.getenv("INGEST_LEASE_SECONDS", "120"))
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+
+# How long the in-memory salary snapshot is served before checking for new jobs,
+# and how many salary reports (per parameter combination) are kept for it
+SALARY_SNAPSHOT_TTL = float(os.getenv("SALARY_SNAPSHOT_TTL", "300"))
+SALARY_REPORT_CACHE_SIZE = int(os.getenv("SALARY_REPORT_CACHE_SIZE", "32"))
+
+# Pooled connections kept open for the read endpoints (and their prepared statements)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+
+# Backoff between attempts to reach Postgres on startup (doubles up to the max)
+STARTUP_RETRY_SECONDS = float(os.getenv("STARTUP_RETRY_SECONDS", "1"))
+STARTUP_RETRY_MAX_SECONDS = float(os.getenv("STARTUP_RETRY_MAX_SECONDS", "30"))
+
 DB_CONFIG = {
     "host": os.getenv("DATABASE_HOST", "postgres"),
     "dbname": os.getenv("DATABASE_NAME", "radar"),
@@ -31,6 +83,14 @@ class JobSearchRequest(BaseModel):
     page: int = 1
 
 
+class CrawlRequest(JobSearchRequest):
+    # Adzuna returns at most 50 results per page
+    results_per_page: int = Field(default=50, ge=1, le=50)
+    max_pages: int = Field(default=10, ge=1, le=100)
+    concurrency: int = Field(default=4, ge=1, le=16)
+    stop_on_known: bool = True
+
+
 class JobResult(BaseModel):
     id: str
     title: str
@@ -47,12 +107,550 @@ class JobResult(BaseModel):
 
 def get_db_connection():
     """Get database connection."""
-    return psycopg2.connect(**DB_CONFIG)
+    return psycopg2.connect(**DB_CONFIG, connection_factory=metrics.InstrumentedConnection)
 
 
-def init_db():
-    """Initialize database schema."""
-    conn = get_db_connection()
+db_pool: Optional[ThreadedConnectionPool] = None
+db_pool_lock = threading.Lock()
+# ThreadedConnectionPool raises instead of waiting when all connections are out
+db_pool_slots = threading.BoundedSemaphore(DB_POOL_SIZE)
+
+
+def get_db_pool() -> ThreadedConnectionPool:
+    """The shared connection pool, created on first use.
+
+    initialize() creates it (through check_db_pool, in a worker thread), so
+    the connections are open before the pod reports ready. minconn equals
+    maxconn because putconn() only keeps a returned connection while fewer
+    than minconn are idle and closes it otherwise.
+    """
+    global db_pool
+    with db_pool_lock:
+        if db_pool is None:
+            db_pool = ThreadedConnectionPool(DB_POOL_SIZE, DB_POOL_SIZE, **DB_CONFIG,
+                                             connection_factory=metrics.InstrumentedConnection)
+        return db_pool
+
+
+@contextmanager
+def pooled_connection():
+    """Borrow a long-lived connection, waiting while all DB_POOL_SIZE are in use.
+
+    The read endpoints use these so prepared statements survive between
+    requests. The transaction is rolled back before the connection goes back.
+    """
+    pool = get_db_pool()
+    with db_pool_slots:
+        conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    pass
+            pool.putconn(conn, close=bool(conn.closed))
+
+
+class TokenBucket:
+    """Async token bucket used to stay within the Adzuna rate limit."""
+
+    def __init__(self, rate_per_second: float, capacity: int):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+adzuna_limiter = TokenBucket(ADZUNA_RATE_PER_MINUTE / 60.0, ADZUNA_BURST)
+
+
+def adzuna_client() -> httpx.AsyncClient:
+    """HTTP client for Adzuna calls (bench/api_bench.py swaps in a mock transport)."""
+    return httpx.AsyncClient(timeout=30.0)
+
+
+def build_search_params(request: JobSearchRequest) -> dict:
+    """Build Adzuna query parameters for a search request."""
+    params = {
+        "app_id": ADZUNA_APP_ID,
+        "app_key": ADZUNA_API_KEY,
+        "results_per_page": request.results_per_page,
+        "what": request.keywords,
+    }
+
+    if request.location:
+        params["where"] = request.location
+
+    if request.max_days_old:
+        params["max_days_old"] = request.max_days_old
+
+    return params
+
+
+async def fetch_adzuna_page(client: httpx.AsyncClient, request: JobSearchRequest, page: int, **extra) -> dict:
+    """Fetch a single result page from Adzuna, respecting the shared rate limit."""
+    await adzuna_limiter.acquire()
+    url = f"{ADZUNA_BASE_URL}/{request.country}/search/{page}"
+    started = time.perf_counter()
+    status = "error"
+    try:
+        response = await client.get(url, params={**build_search_params(request), **extra})
+        status = str(response.status_code)
+    finally:
+        metrics.ADZUNA_SECONDS.labels(status).observe(time.perf_counter() - started)
+    response.raise_for_status()
+    return response.json()
+
+
+def create_search(cur, request: JobSearchRequest, data: dict) -> int:
+    """Record a search in job_searches and return its id."""
+    cur.execute("""
+        INSERT INTO job_searches (search_query, country, location, result_count, mean_salary)
+        VALUES (%s, %s, %s, %s, %s)
+        RETURNING id
+    """, (request.keywords, request.country, request.location, data.get("count", 0), data.get("mean", 0)))
+    search_id = cur.fetchone()[0]
+    cur.execute("""
+        INSERT INTO job_stats (dimension, key, row_count) VALUES ('searches', '', 1)
+        ON CONFLICT (dimension, key) DO UPDATE SET row_count = job_stats.row_count + 1
+    """)
+    return search_id
+
+
+# Postgres text search configuration per Adzuna country; anything not listed
+# (mixed-language markets like be/ch, or languages without a built-in
+# stemmer such as Polish) falls back to 'simple', which only lowercases.
+TEXT_SEARCH_LANGUAGES = {
+    "at": "german", "de": "german",
+    "au": "english", "ca": "english", "gb": "english", "in": "english",
+    "nz": "english", "sg": "english", "us": "english", "za": "english",
+    "br": "portuguese",
+    "es": "spanish", "mx": "spanish",
+    "fr": "french",
+    "it": "italian",
+    "nl": "dutch",
+    "ru": "russian",
+}
+
+
+def text_search_language(country: Optional[str]) -> str:
+    """Text search configuration used to index jobs found in a country."""
+    return TEXT_SEARCH_LANGUAGES.get((country or "").lower(), "simple")
+
+
+# Columns returned by the job listing endpoints (everything but the search index)
+JOB_COLUMNS = """id, search_id, job_id, title, description, company, location,
+    salary_min, salary_max, contract_type, contract_time, redirect_url,
+    created_date, saved_at, cluster_id, latitude, longitude, location_area,
+    category_tag, category_label"""
+JOB_FIELDS = [column.strip() for column in JOB_COLUMNS.split(",")]
+
+
+def job_fields(fields: Optional[str]) -> List[str]:
+    """Columns for a ``fields=title,company,...`` projection; all of them by default."""
+    if not fields:
+        return JOB_FIELDS
+    selected = list(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in selected if field not in JOB_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}; "
+                                                    f"available: {', '.join(JOB_FIELDS)}")
+    return selected
+
+
+def cluster_jobs(cur, postings: List[tuple]) -> List[tuple]:
+    """Assign near-duplicate clusters to (job_id, title, company, description) postings.
+
+    Returns (simhash, bands, cluster_id) per posting. A posting joins the
+    cluster of the closest stored or earlier posting within
+    dedupe.MAX_DISTANCE bits; otherwise it starts a cluster named after its
+    own job_id. Candidates are looked up through the GIN index on the band keys.
+    A posting without any words gets no hash and always is its own cluster.
+    """
+    hashes = [dedupe.simhash(title, company, description) for _, title, company, description in postings]
+    all_bands = sorted({band for h in hashes if h is not None for band in dedupe.bands(h)})
+
+    by_band = {}
+    cur.execute("""
+        SELECT simhash, cluster_id FROM jobs
+        WHERE simhash_bands && %s::integer[]
+    """, (all_bands,))
+    for stored_hash, cluster_id in cur.fetchall():
+        stored_hash = dedupe.to_unsigned(stored_hash)
+        for band in dedupe.bands(stored_hash):
+            by_band.setdefault(band, []).append((stored_hash, cluster_id))
+
+    clusters = []
+    for (job_id, *_), h in zip(postings, hashes):
+        if h is None:
+            clusters.append((None, [], job_id))
+            continue
+        job_bands = dedupe.bands(h)
+        matches = [
+            (dedupe.distance(h, other), cluster_id)
+            for band in job_bands
+            for other, cluster_id in by_band.get(band, [])
+        ]
+        matches = [match for match in matches if match[0] <= dedupe.MAX_DISTANCE]
+        cluster_id = min(matches)[1] if matches else job_id
+        for band in job_bands:
+            by_band.setdefault(band, []).append((h, cluster_id))
+        clusters.append((dedupe.to_signed(h), job_bands, cluster_id))
+    return clusters
+
+
+def backfill_job_clusters(cur, batch_size: int = 1000):
+    """Compute SimHash and clusters for jobs that have no cluster yet."""
+    last_id = 0
+    while True:
+        # Keyset on id: jobs without words keep a NULL simhash
+        cur.execute("""
+            SELECT id, job_id, title, company, description FROM jobs
+            WHERE cluster_id IS NULL AND id > %s
+            ORDER BY id
+            LIMIT %s
+        """, (last_id, batch_size))
+        rows = cur.fetchall()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        clusters = cluster_jobs(cur, [row[1:] for row in rows])
+        execute_values(cur, """
+            UPDATE jobs SET simhash = v.simhash, simhash_bands = v.bands, cluster_id = v.cluster_id
+            FROM (VALUES %s) AS v(id, simhash, bands, cluster_id)
+            WHERE jobs.id = v.id
+        """, [(row[0], *cluster) for row, cluster in zip(rows, clusters)],
+            template="(%s, %s::bigint, %s::integer[], %s)")
+
+
+def reset_unicode_job_clusters(cur):
+    """Clear the clusters of jobs whose SimHash changed with Unicode-aware words.
+
+    Until then every letter outside a-z was dropped, so text in Cyrillic,
+    Greek, CJK etc. lost some or all of its words, and postings without any
+    left all shared the hash of the empty string (and one cluster).
+    """
+    empty_hash = dedupe.to_signed(dedupe.LEGACY_EMPTY_HASH)
+    cur.execute("""
+        UPDATE jobs SET simhash = NULL, simhash_bands = NULL, cluster_id = NULL
+        WHERE simhash = %s
+           OR coalesce(title, '') || coalesce(company, '') || coalesce(description, '') ~ '[^[:ascii:]]'
+           OR cluster_id IN (SELECT job_id FROM jobs WHERE simhash = %s)
+    """, (empty_hash, empty_hash))
+
+
+def update_search_totals(cur, search_id: int, data: dict):
+    """Fill in the Adzuna totals once they have been read from the response."""
+    cur.execute("""
+        UPDATE job_searches SET result_count = %s, mean_salary = %s WHERE id = %s
+    """, (data.get("count", 0), data.get("mean", 0), search_id))
+
+
+def job_to_row(search_id: int, job: dict, language: str, cluster: tuple) -> tuple:
+    """Map an Adzuna result to a jobs table row."""
+    return (
+        search_id,
+        job.get("id"),
+        job.get("title"),
+        job.get("description"),
+        job.get("company", {}).get("display_name"),
+        job.get("location", {}).get("display_name"),
+        job.get("salary_min"),
+        job.get("salary_max"),
+        job.get("contract_type"),
+        job.get("contract_time"),
+        job.get("redirect_url"),
+        datetime.fromisoformat(job.get("created").replace("Z", "+00:00")) if job.get("created") else None,
+        language,
+        *cluster,
+        job.get("latitude"),
+        job.get("longitude"),
+        job.get("location", {}).get("area"),
+        job.get("category", {}).get("tag"),
+        job.get("category", {}).get("label"),
+    )
+
+
+def job_stats_rollup(source: str, positions: bool = True) -> str:
+    """SQL aggregating a set of jobs (`source`) into job_stats rows.
+
+    Produces one overall row plus one per country, contract type and contract
+    time. Used both for backfills and for every insert batch, so the two can't
+    drift apart. ``positions`` counts cluster representatives (distinct
+    positions); it is off only for the migration that predates clustering.
+    """
+    return JOB_STATS_ROLLUP.format(
+        source=source,
+        position_column=", position_count" if positions else "",
+        position_value=", COUNT(*) FILTER (WHERE j.cluster_id = j.job_id)" if positions else "",
+        position_update=",\n        position_count = job_stats.position_count + EXCLUDED.position_count" if positions else "",
+    )
+
+
+JOB_STATS_ROLLUP = """
+    INSERT INTO job_stats (dimension, key, row_count, salary_count,
+                           salary_min_sum, salary_max_sum, salary_min, salary_max{position_column})
+    SELECT d.dimension, d.key,
+           COUNT(*),
+           COUNT(*) FILTER (WHERE j.salary_min IS NOT NULL AND j.salary_max IS NOT NULL),
+           COALESCE(SUM(j.salary_min) FILTER (WHERE j.salary_min IS NOT NULL AND j.salary_max IS NOT NULL), 0),
+           COALESCE(SUM(j.salary_max) FILTER (WHERE j.salary_min IS NOT NULL AND j.salary_max IS NOT NULL), 0),
+           MIN(j.salary_min),
+           MAX(j.salary_max){position_value}
+    FROM {source} j
+    LEFT JOIN job_searches s ON s.id = j.search_id
+    CROSS JOIN LATERAL (VALUES
+        ('total', ''),
+        ('country', COALESCE(s.country, 'unknown')),
+        ('contract_type', COALESCE(j.contract_type, 'unknown')),
+        ('contract_time', COALESCE(j.contract_time, 'unknown'))
+    ) AS d(dimension, key)
+    GROUP BY d.dimension, d.key
+    ORDER BY d.dimension, d.key
+    ON CONFLICT (dimension, key) DO UPDATE SET
+        row_count = job_stats.row_count + EXCLUDED.row_count,
+        salary_count = job_stats.salary_count + EXCLUDED.salary_count,
+        salary_min_sum = job_stats.salary_min_sum + EXCLUDED.salary_min_sum,
+        salary_max_sum = job_stats.salary_max_sum + EXCLUDED.salary_max_sum,
+        salary_min = LEAST(job_stats.salary_min, EXCLUDED.salary_min),
+        salary_max = GREATEST(job_stats.salary_max, EXCLUDED.salary_max){position_update}
+"""
+
+
+def insert_jobs(cur, search_id: int, jobs: List[dict], country: Optional[str]) -> int:
+    """Bulk insert jobs, skipping ones already stored. Returns the number of new rows.
+
+    Each job is assigned a near-duplicate cluster first, and the running
+    aggregates in job_stats are updated in the same statement from the rows
+    that were actually inserted.
+    """
+    if not jobs:
+        return 0
+    language = text_search_language(country)
+    clusters = cluster_jobs(cur, [
+        (job.get("id"), job.get("title"), job.get("company", {}).get("display_name"), job.get("description"))
+        for job in jobs
+    ])
+    pages = execute_values(cur, """
+        WITH inserted AS (
+            INSERT INTO jobs (
+                search_id, job_id, title, description, company, location,
+                salary_min, salary_max, contract_type, contract_time,
+                redirect_url, created_date, language,
+                simhash, simhash_bands, cluster_id,
+                latitude, longitude, location_area, category_tag, category_label
+            ) VALUES %s
+            ON CONFLICT (job_id) DO NOTHING
+            RETURNING search_id, job_id, cluster_id, salary_min, salary_max, contract_type, contract_time
+        ), rollup AS (
+    """ + job_stats_rollup("inserted") + """
+        )
+        SELECT COUNT(*) FROM inserted
+    """, [job_to_row(search_id, job, language, cluster) for job, cluster in zip(jobs, clusters)],
+        template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s::regconfig, %s, %s::integer[], %s, "
+                 "%s, %s, %s::text[], %s, %s)",
+        fetch=True)
+    inserted = sum(row[0] for row in pages)
+    metrics.JOBS_INSERTED.inc(inserted)
+    return inserted
+
+
+def save_page(conn, search_id: int, jobs: List[dict], country: Optional[str]) -> int:
+    """Insert one page of jobs in its own transaction."""
+    cur = conn.cursor()
+    try:
+        inserted = insert_jobs(cur, search_id, jobs, country)
+        conn.commit()
+        return inserted
+    finally:
+        cur.close()
+
+
+# Schema changes applied on top of the base tables, in order. Each entry is
+# (version, description, statements), where a statement is SQL or a callable
+# taking the cursor; applied versions are recorded in schema_migrations so
+# every migration runs exactly once per database.
+MIGRATIONS = [
+    (1, "Index jobs and searches for the list endpoints", [
+        "CREATE INDEX IF NOT EXISTS idx_jobs_search_id_saved_at ON jobs (search_id, saved_at DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_saved_at ON jobs (saved_at DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_job_searches_created_at ON job_searches (created_at DESC)",
+    ]),
+    (2, "Running aggregates for /stats", [
+        """
+        CREATE TABLE IF NOT EXISTS job_stats (
+            dimension VARCHAR(32) NOT NULL,
+            key TEXT NOT NULL,
+            row_count BIGINT NOT NULL DEFAULT 0,
+            salary_count BIGINT NOT NULL DEFAULT 0,
+            salary_min_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            salary_max_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            salary_min FLOAT,
+            salary_max FLOAT,
+            PRIMARY KEY (dimension, key)
+        )
+        """,
+        "LOCK TABLE jobs, job_searches IN SHARE MODE",
+        "DELETE FROM job_stats",
+        "INSERT INTO job_stats (dimension, key, row_count) SELECT 'searches', '', COUNT(*) FROM job_searches",
+        job_stats_rollup("jobs", positions=False),
+    ]),
+    (3, "Keyset pagination on (saved_at, id)", [
+        "CREATE INDEX IF NOT EXISTS idx_jobs_search_id_saved_at_id ON jobs (search_id, saved_at DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_saved_at_id ON jobs (saved_at DESC, id DESC)",
+        "DROP INDEX IF EXISTS idx_jobs_search_id_saved_at",
+        "DROP INDEX IF EXISTS idx_jobs_saved_at",
+    ]),
+    (4, "Full-text search over job titles and descriptions", [
+        "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS language regconfig NOT NULL DEFAULT 'simple'",
+        """
+        UPDATE jobs j SET language = CASE lower(s.country) """ + " ".join(
+            f"WHEN '{country}' THEN '{language}'::regconfig" for country, language in TEXT_SEARCH_LANGUAGES.items()
+        ) + """ ELSE 'simple'::regconfig END
+        FROM job_searches s
+        WHERE s.id = j.search_id
+        """,
+        """
+        ALTER TABLE jobs ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector(language, coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(company, '')), 'B') ||
+            setweight(to_tsvector(language, coalesce(description, '')), 'C')
+        ) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_jobs_search_vector ON jobs USING GIN (search_vector)",
+    ]),
+    (5, "Near-duplicate clusters of reposted jobs", [
+        "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS simhash BIGINT",
+        "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS simhash_bands INTEGER[]",
+        "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS cluster_id VARCHAR(255)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_simhash_bands ON jobs USING GIN (simhash_bands)",
+        "LOCK TABLE jobs, job_searches IN SHARE MODE",
+        backfill_job_clusters,
+        "CREATE INDEX IF NOT EXISTS idx_jobs_cluster_id ON jobs (cluster_id)",
+        """
+        CREATE INDEX IF NOT EXISTS idx_jobs_positions_saved_at_id ON jobs (saved_at DESC, id DESC)
+        WHERE cluster_id = job_id
+        """,
+        "ALTER TABLE job_stats ADD COLUMN IF NOT EXISTS position_count BIGINT NOT NULL DEFAULT 0",
+        "DELETE FROM job_stats",
+        "INSERT INTO job_stats (dimension, key, row_count) SELECT 'searches', '', COUNT(*) FROM job_searches",
+        job_stats_rollup("jobs"),
+    ]),
+    (6, "Geo coordinates, location area and category", [
+        "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS latitude DOUBLE PRECISION",
+        "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS longitude DOUBLE PRECISION",
+        "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS location_area TEXT[]",
+        "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS category_tag VARCHAR(100)",
+        "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS category_label TEXT",
+        """
+        CREATE INDEX IF NOT EXISTS idx_jobs_lat_lon ON jobs (latitude, longitude)
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+        """,
+    ]),
+    (7, "Durable ingestion queue for /search", [
+        """
+        CREATE TABLE IF NOT EXISTS ingest_tasks (
+            id SERIAL PRIMARY KEY,
+            request JSONB NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'queued',
+            search_id INTEGER REFERENCES job_searches(id),
+            jobs_received INTEGER NOT NULL DEFAULT 0,
+            jobs_saved INTEGER NOT NULL DEFAULT 0,
+            total_results INTEGER,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            locked_until TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_ingest_tasks_pending ON ingest_tasks (id)
+        WHERE status IN ('queued', 'running')
+        """,
+    ]),
+    (8, "Recluster jobs with non-ASCII text", [
+        "LOCK TABLE jobs, job_searches IN SHARE MODE",
+        reset_unicode_job_clusters,
+        backfill_job_clusters,
+        "DELETE FROM job_stats",
+        "INSERT INTO job_stats (dimension, key, row_count) SELECT 'searches', '', COUNT(*) FROM job_searches",
+        job_stats_rollup("jobs"),
+    ]),
+]
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent pods don't migrate at once
+MIGRATION_LOCK_ID = 726354
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn) -> int:
+    """Latest applied migration, or 0 on a database that has none yet."""
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+        return cur.fetchone()[0]
+    except UndefinedTable:
+        return 0
+    finally:
+        conn.rollback()
+        cur.close()
+
+
+def run_migrations(conn) -> List[int]:
+    """Apply pending migrations in a single transaction. Returns the versions applied."""
+    cur = conn.cursor()
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+    cur.execute("SELECT version FROM schema_migrations")
+    done = {row[0] for row in cur.fetchall()}
+
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        if version in done:
+            continue
+        for statement in statements:
+            if callable(statement):
+                statement(cur)
+            else:
+                cur.execute(statement)
+        cur.execute(
+            "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+            (version, description),
+        )
+        applied.append(version)
+
+    conn.commit()
+    cur.close()
+    return applied
+
+
+def create_tables(conn):
+    """Create the base tables if they don't exist yet."""
     cur = conn.cursor()
 
     cur.execute("""
@@ -86,18 +684,363 @@ def init_db():
         )
     """)
 
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS search_refresh_runs (
+            id SERIAL PRIMARY KEY,
+            search_id INTEGER REFERENCES job_searches(id),
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            duration_ms FLOAT,
+            jobs_fetched INTEGER,
+            new_jobs INTEGER,
+            error TEXT
+        )
+    """)
+
+    conn.commit()
+    cur.close()
+
+
+def init_db():
+    """Initialize database schema.
+
+    A database already at SCHEMA_VERSION costs a single query; the DDL only
+    runs when schema_migrations says something is missing.
+    """
+    conn = get_db_connection()
+    try:
+        if schema_version(conn) >= SCHEMA_VERSION:
+            return
+        create_tables(conn)
+        applied = run_migrations(conn)
+        if applied:
+            print(f"Applied schema migrations: {applied}")
+    finally:
+        conn.close()
+
+
+def load_saved_searches(limit: int) -> List[dict]:
+    """Distinct saved queries, most recently used first, keyed by their latest search id."""
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute("""
+        SELECT MAX(id) AS search_id, search_query, country, location
+        FROM job_searches
+        GROUP BY search_query, country, location
+        ORDER BY MAX(created_at) DESC
+        LIMIT %s
+    """, (limit,))
+    searches = cur.fetchall()
+    cur.close()
+    conn.close()
+    return searches
+
+
+def record_refresh_run(search_id: int, duration_ms: float, jobs_fetched: int, new_jobs: int, error: Optional[str]):
+    """Store the outcome of one scheduled refresh."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        INSERT INTO search_refresh_runs (search_id, started_at, duration_ms, jobs_fetched, new_jobs, error)
+        VALUES (%s, CURRENT_TIMESTAMP - make_interval(secs => %s), %s, %s, %s, %s)
+    """, (search_id, duration_ms / 1000, duration_ms, jobs_fetched, new_jobs, error))
+    conn.commit()
+    cur.close()
+    conn.close()
+
+
+def save_refreshed_jobs(search_id: int, jobs: List[dict], country: str) -> int:
+    """Insert refreshed jobs under the original search."""
+    conn = get_db_connection()
+    try:
+        return save_page(conn, search_id, jobs, country)
+    finally:
+        conn.close()
+
+
+async def refresh_search(client: httpx.AsyncClient, search: dict):
+    """Re-run one saved search and record duration and new-job count."""
+    request = JobSearchRequest(
+        keywords=search["search_query"],
+        country=search["country"],
+        location=search["location"],
+        results_per_page=50,
+    )
+    started = time.perf_counter()
+    jobs_fetched = new_jobs = 0
+    error = None
+    try:
+        data = await fetch_adzuna_page(client, request, 1, sort_by="date")
+        results = data.get("results", [])
+        jobs_fetched = len(results)
+        new_jobs = await asyncio.to_thread(save_refreshed_jobs, search["search_id"], results, search["country"])
+    except Exception as e:
+        error = str(e)
+        print(f"Refresh of search {search['search_id']} failed: {e}")
+    duration_ms = (time.perf_counter() - started) * 1000
+    await asyncio.to_thread(record_refresh_run, search["search_id"], duration_ms, jobs_fetched, new_jobs, error)
+
+
+async def refresh_scheduler():
+    """Periodically re-run saved searches, spread across the interval with jitter."""
+    interval = REFRESH_INTERVAL_MINUTES * 60
+    async with adzuna_client() as client:
+        while True:
+            try:
+                searches = await asyncio.to_thread(load_saved_searches, REFRESH_MAX_SEARCHES)
+            except Exception as e:
+                print(f"Failed to load saved searches: {e}")
+                searches = []
+
+            if not searches:
+                await asyncio.sleep(interval)
+                continue
+
+            random.shuffle(searches)
+            spacing = interval / len(searches)
+            for search in searches:
+                await asyncio.sleep(spacing * random.uniform(1 - REFRESH_JITTER, 1 + REFRESH_JITTER))
+                try:
+                    await refresh_search(client, search)
+                except Exception as e:
+                    print(f"Failed to record refresh of search {search['search_id']}: {e}")
+
+
+def enqueue_ingest_task(request: JobSearchRequest) -> int:
+    """Queue a search for the ingestion workers and return the task id."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("INSERT INTO ingest_tasks (request) VALUES (%s) RETURNING id", (request.model_dump_json(),))
+    task_id = cur.fetchone()[0]
+    conn.commit()
+    cur.close()
+    conn.close()
+    return task_id
+
+
+def task_search_id(cur, task_id: int, request: JobSearchRequest) -> int:
+    """The task's search, created and recorded on the task in the caller's transaction.
+
+    The task row is locked first, so a retry (or a worker overlapping with a
+    stalled one) reuses the search an earlier attempt created instead of
+    adding another job_searches row and counting the search twice.
+    """
+    cur.execute("SELECT search_id FROM ingest_tasks WHERE id = %s FOR UPDATE", (task_id,))
+    search_id = cur.fetchone()[0]
+    if search_id is None:
+        search_id = create_search(cur, request, {})
+        cur.execute("UPDATE ingest_tasks SET search_id = %s WHERE id = %s", (search_id, task_id))
+    return search_id
+
+
+def claim_ingest_task() -> Optional[tuple]:
+    """Lease the oldest queued (or abandoned) task to this worker.
+
+    FOR UPDATE SKIP LOCKED lets workers in every replica poll the same table
+    without blocking on or double-claiming each other's tasks. A task whose
+    lease ran out (its worker died or stalled) is claimed again, unless it
+    already had INGEST_MAX_ATTEMPTS attempts; then it is marked failed.
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        UPDATE ingest_tasks SET status = 'failed', locked_until = NULL,
+            error = 'Lease expired on the last attempt', finished_at = CURRENT_TIMESTAMP
+        WHERE status = 'running' AND locked_until < CURRENT_TIMESTAMP AND attempts >= %s
+    """, (INGEST_MAX_ATTEMPTS,))
+    cur.execute("""
+        UPDATE ingest_tasks SET
+            status = 'running',
+            attempts = attempts + 1,
+            started_at = CURRENT_TIMESTAMP,
+            locked_until = CURRENT_TIMESTAMP + make_interval(secs => %s)
+        WHERE id = (
+            SELECT id FROM ingest_tasks
+            WHERE status = 'queued'
+               OR (status = 'running' AND locked_until < CURRENT_TIMESTAMP AND attempts < %s)
+            ORDER BY id
+            FOR UPDATE SKIP LOCKED
+            LIMIT 1
+        )
+        RETURNING id, request, attempts
+    """, (INGEST_LEASE_SECONDS, INGEST_MAX_ATTEMPTS))
+    task = cur.fetchone()
+    conn.commit()
+    cur.close()
+    conn.close()
+    return task
+
+
+def update_ingest_task(task_id: int, **fields):
+    """Update a task's progress columns and extend its lease."""
+    assignments = ", ".join(f"{column} = %s" for column in fields)
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute(f"""
+        UPDATE ingest_tasks SET {assignments},
+            locked_until = CURRENT_TIMESTAMP + make_interval(secs => %s)
+        WHERE id = %s
+    """, (*fields.values(), INGEST_LEASE_SECONDS, task_id))
+    conn.commit()
+    cur.close()
+    conn.close()
+
+
+def finish_ingest_task(task_id: int, status: str, error: Optional[str] = None):
+    """Mark a task done, failed, or queued again for another attempt."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        UPDATE ingest_tasks SET status = %s, error = %s, locked_until = NULL,
+            finished_at = CASE WHEN %s = 'queued' THEN NULL ELSE CURRENT_TIMESTAMP END
+        WHERE id = %s
+    """, (status, error, status, task_id))
     conn.commit()
     cur.close()
     conn.close()
 
 
+ingest_wakeup = asyncio.Event()
+
+
+async def ingest_worker(client: httpx.AsyncClient):
+    """Process queued searches until cancelled."""
+    while True:
+        try:
+            task = await asyncio.to_thread(claim_ingest_task)
+        except Exception as e:
+            print(f"Failed to claim ingest task: {e}")
+            task = None
+
+        if task is None:
+            try:
+                await asyncio.wait_for(ingest_wakeup.wait(), timeout=INGEST_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            ingest_wakeup.clear()
+            continue
+
+        task_id, request_data, attempts = task
+
+        async def on_progress(search_id: int, jobs_received: int, jobs_saved: int):
+            await asyncio.to_thread(update_ingest_task, task_id,
+                                    jobs_received=jobs_received, jobs_saved=jobs_saved)
+
+        try:
+            summary = await ingest_search(client, JobSearchRequest(**request_data), task_id=task_id,
+                                          include_results=False, on_progress=on_progress)
+            await asyncio.to_thread(update_ingest_task, task_id, total_results=summary["total_results"])
+            await asyncio.to_thread(finish_ingest_task, task_id, "done")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            status = "queued" if attempts < INGEST_MAX_ATTEMPTS else "failed"
+            print(f"Ingest task {task_id} attempt {attempts} failed: {e}")
+            try:
+                await asyncio.to_thread(finish_ingest_task, task_id, status, str(e))
+            except Exception as e:
+                print(f"Failed to record ingest task {task_id} failure: {e}")
+
+
+background_tasks: List[asyncio.Task] = []
+ingest_client: Optional[httpx.AsyncClient] = None
+
+
+# Reported by /ready; the pod only gets traffic once both are True
+startup_status = {"schema": False, "pool": False, "attempts": 0, "error": None}
+
+
+def check_db_pool():
+    """Open a pooled connection and run a trivial query on it."""
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT 1")
+        cur.close()
+
+
+async def initialize():
+    """Set up the schema and connection pool, retrying with backoff until both work.
+
+    Runs as a background task so startup never blocks on Postgres; the
+    background workers that need the schema are started once it is up.
+    """
+    delay = STARTUP_RETRY_SECONDS
+    while True:
+        startup_status["attempts"] += 1
+        try:
+            if not startup_status["schema"]:
+                await asyncio.to_thread(init_db)
+                startup_status["schema"] = True
+            await asyncio.to_thread(check_db_pool)
+            startup_status["pool"] = True
+            startup_status["error"] = None
+            break
+        except Exception as e:
+            # Only the exception type: /ready is public, and psycopg2's
+            # message names the host, user and database (it is logged below)
+            startup_status["error"] = type(e).__name__
+            print(f"Database initialization failed (attempt {startup_status['attempts']}), "
+                  f"retrying in {delay:.0f}s: {e}")
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+            delay = min(delay * 2, STARTUP_RETRY_MAX_SECONDS)
+
+    start_background_workers()
+
+
+def start_background_workers():
+    """Start the refresh scheduler and ingestion workers, if configured."""
+    global ingest_client
+    if REFRESH_INTERVAL_MINUTES > 0 and ADZUNA_APP_ID and ADZUNA_API_KEY:
+        background_tasks.append(asyncio.create_task(refresh_scheduler()))
+
+    if INGEST_WORKERS > 0 and ADZUNA_APP_ID and ADZUNA_API_KEY:
+        ingest_client = adzuna_client()
+        for _ in range(INGEST_WORKERS):
+            background_tasks.append(asyncio.create_task(ingest_worker(ingest_client)))
+
+
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on startup."""
+    """Start database initialization in the background; /ready reports when it's done."""
+    background_tasks.append(asyncio.create_task(initialize()))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the background refresh scheduler and ingestion workers.
+
+    A task interrupted mid-way stays leased until INGEST_LEASE_SECONDS pass,
+    after which a worker in any replica picks it up again.
+    """
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    if ingest_client:
+        await ingest_client.aclose()
+    if db_pool:
+        db_pool.closeall()
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record request latency per route template (not per raw path)."""
+    started = time.perf_counter()
+    status = 500
     try:
-        init_db()
-    except Exception as e:
-        print(f"Failed to initialize database: {e}")
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics.REQUEST_SECONDS.labels(
+            request.method, route.path if route else "unmatched", str(status)
+        ).observe(time.perf_counter() - started)
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus metrics: request latency, Adzuna vs. database time, inserted jobs."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
 @app.get("/health")
@@ -106,6 +1049,15 @@ def health():
     return {"status": "ok", "service": "freelance-radar"}
 
 
+@app.get("/ready")
+def ready(response: Response):
+    """Readiness: the schema is up to date and the connection pool works."""
+    is_ready = startup_status["schema"] and startup_status["pool"]
+    if not is_ready:
+        response.status_code = 503
+    return {"ready": is_ready, **startup_status}
+
+
 @app.get("/db")
 def db_check():
     """Database connectivity check."""
@@ -121,172 +1073,706 @@ def db_check():
         raise HTTPException(status_code=500, detail=f"Database connection failed: {str(e)}")
 
 
-@app.post("/search", response_model=dict)
-async def search_jobs(request: JobSearchRequest):
-    """Search for jobs using Adzuna API and store results."""
-    if not ADZUNA_APP_ID or not ADZUNA_API_KEY:
-        raise HTTPException(status_code=500, detail="Adzuna API credentials not configured")
+async def ingest_search(
+    client: httpx.AsyncClient,
+    request: JobSearchRequest,
+    search_id: Optional[int] = None,
+    include_results: bool = True,
+    on_progress=None,
+    task_id: Optional[int] = None,
+) -> dict:
+    """Fetch one Adzuna result page and store it, streaming jobs into the database.
 
+    The response body is parsed incrementally and jobs are inserted and
+    committed in batches of INSERT_BATCH_SIZE as they arrive. ``on_progress``
+    is awaited with (search_id, jobs_received, jobs_saved) after every batch.
+    For a queued search (``task_id``) the search is recorded on the task as
+    soon as it is created, so later attempts reuse it.
+    """
     url = f"{ADZUNA_BASE_URL}/{request.country}/search/{request.page}"
 
-    params = {
-        "app_id": ADZUNA_APP_ID,
-        "app_key": ADZUNA_API_KEY,
-        "results_per_page": request.results_per_page,
-        "what": request.keywords,
+    await adzuna_limiter.acquire()
+    started = time.perf_counter()
+    adzuna_seconds = 0.0
+    status = "error"
+
+    async def timed_body(response: httpx.Response):
+        """Body chunks, adding the time spent waiting on each to adzuna_seconds."""
+        nonlocal adzuna_seconds
+        chunks = response.aiter_bytes().__aiter__()
+        while True:
+            waited = time.perf_counter()
+            try:
+                chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                return
+            finally:
+                adzuna_seconds += time.perf_counter() - waited
+            yield chunk
+
+    try:
+        async with client.stream("GET", url, params=build_search_params(request)) as response:
+            adzuna_seconds = time.perf_counter() - started
+            status = str(response.status_code)
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+
+            stream = adzuna_stream.ResultStream(timed_body(response))
+            results, job_ids, batch = [], [], []
+            jobs_saved = 0
+
+            conn = get_db_connection()
+            try:
+                cur = conn.cursor()
+                if task_id is not None:
+                    search_id = task_search_id(cur, task_id, request)
+                    conn.commit()
+                elif search_id is None:
+                    search_id = create_search(cur, request, {})
+                    conn.commit()
+
+                async def flush():
+                    nonlocal batch, jobs_saved
+                    jobs_saved += await asyncio.to_thread(save_page, conn, search_id, batch, request.country)
+                    batch = []
+                    if on_progress:
+                        await on_progress(search_id, len(job_ids), jobs_saved)
+
+                async for job in stream.jobs():
+                    job_ids.append(job.get("id"))
+                    if include_results:
+                        results.append(job)
+                    batch.append(job)
+                    if len(batch) >= INSERT_BATCH_SIZE:
+                        await flush()
+                await flush()
+
+                update_search_totals(cur, search_id, stream.meta)
+                conn.commit()
+                cur.close()
+            finally:
+                conn.close()
+    finally:
+        metrics.ADZUNA_SECONDS.labels(status).observe(adzuna_seconds or time.perf_counter() - started)
+
+    summary = {
+        "search_id": search_id,
+        "total_results": stream.meta.get("count", 0),
+        "mean_salary": stream.meta.get("mean", 0),
+        "results_returned": len(job_ids),
+        "jobs_saved": jobs_saved,
     }
+    if include_results:
+        summary["results"] = results
+    else:
+        summary["job_ids"] = job_ids
+    return summary
 
-    if request.location:
-        params["where"] = request.location
 
-    if request.max_days_old:
-        params["max_days_old"] = request.max_days_old
+@app.post("/search", response_model=dict)
+async def search_jobs(
+    request: JobSearchRequest,
+    response: Response,
+    wait: bool = False,
+    include_results: bool = True,
+):
+    """Queue a job search; the ingestion workers call Adzuna and store the results.
+
+    Returns a task id immediately (202); poll ``/search/{task_id}`` for
+    progress. With ``wait=true`` the search runs inline and the stored results
+    are returned as before (``include_results=false`` returns only job ids).
+    """
+    if not ADZUNA_APP_ID or not ADZUNA_API_KEY:
+        raise HTTPException(status_code=500, detail="Adzuna API credentials not configured")
+
+    if not wait:
+        try:
+            task_id = await asyncio.to_thread(enqueue_ingest_task, request)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to queue search: {str(e)}")
+        ingest_wakeup.set()
+        response.status_code = 202
+        return {"task_id": task_id, "status": "queued", "status_url": f"/search/{task_id}"}
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+        async with adzuna_client() as client:
+            return await ingest_search(client, request, include_results=include_results)
+
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(status_code=e.response.status_code, detail=f"Adzuna API error: {e.response.text}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
+
+@app.get("/search/{task_id}")
+def get_search_task(task_id: int):
+    """Get the status and progress of a queued search."""
+    try:
         conn = get_db_connection()
-        cur = conn.cursor()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
 
         cur.execute("""
-            INSERT INTO job_searches (search_query, country, location, result_count, mean_salary)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING id
-        """, (request.keywords, request.country, request.location, data.get("count", 0), data.get("mean", 0)))
+            SELECT id AS task_id, status, request, search_id, jobs_received, jobs_saved,
+                   total_results, attempts, error, created_at, started_at, finished_at
+            FROM ingest_tasks
+            WHERE id = %s
+        """, (task_id,))
+
+        task = cur.fetchone()
+        cur.close()
+        conn.close()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch search task: {str(e)}")
+
+    if task is None:
+        raise HTTPException(status_code=404, detail="Search task not found")
+    return task
 
-        search_id = cur.fetchone()[0]
 
-        jobs_saved = 0
-        for job in data.get("results", []):
+@app.post("/crawl", response_model=dict)
+async def crawl_jobs(request: CrawlRequest):
+    """Fetch every result page for a query and store the jobs.
+
+    Pages are fetched concurrently (bounded by ``concurrency`` and the shared
+    Adzuna rate limiter) sorted newest first, and each page is inserted as soon
+    as it arrives. With ``stop_on_known`` the crawl stops at the first page
+    containing jobs that are already stored, since everything older has been
+    seen before.
+    """
+    if not ADZUNA_APP_ID or not ADZUNA_API_KEY:
+        raise HTTPException(status_code=500, detail="Adzuna API credentials not configured")
+
+    try:
+        async with adzuna_client() as client:
+            first = await fetch_adzuna_page(client, request, request.page, sort_by="date")
+
+            conn = get_db_connection()
             try:
-                cur.execute("""
-                    INSERT INTO jobs (
-                        search_id, job_id, title, description, company, location,
-                        salary_min, salary_max, contract_type, contract_time,
-                        redirect_url, created_date
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (job_id) DO NOTHING
-                """, (
-                    search_id,
-                    job.get("id"),
-                    job.get("title"),
-                    job.get("description"),
-                    job.get("company", {}).get("display_name"),
-                    job.get("location", {}).get("display_name"),
-                    job.get("salary_min"),
-                    job.get("salary_max"),
-                    job.get("contract_type"),
-                    job.get("contract_time"),
-                    job.get("redirect_url"),
-                    datetime.fromisoformat(job.get("created").replace("Z", "+00:00")) if job.get("created") else None
-                ))
-                jobs_saved += 1
-            except Exception as e:
-                print(f"Error saving job {job.get('id')}: {e}")
+                cur = conn.cursor()
+                search_id = create_search(cur, request, first)
+                conn.commit()
+                cur.close()
 
-        conn.commit()
-        cur.close()
-        conn.close()
+                results = first.get("results", [])
+                jobs_saved = await asyncio.to_thread(save_page, conn, search_id, results, request.country)
+                pages_fetched = 1
+                stopped_early = request.stop_on_known and jobs_saved < len(results)
+
+                total_pages = min(request.max_pages, math.ceil(first.get("count", 0) / request.results_per_page))
+                remaining = range(request.page + 1, request.page + total_pages)
+
+                if not stopped_early and remaining:
+                    semaphore = asyncio.Semaphore(request.concurrency)
+                    # Lowest page that was empty or contained stored jobs;
+                    # only the pages after it are no longer needed
+                    stop_page = math.inf
+
+                    async def fetch(page: int):
+                        async with semaphore:
+                            if page > stop_page:
+                                return None
+                            return await fetch_adzuna_page(client, request, page, sort_by="date")
+
+                    tasks = {asyncio.create_task(fetch(page)): page for page in remaining}
+                    pending = set(tasks)
+                    try:
+                        while pending:
+                            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                            # Pages finish in any order; handle the newer ones first
+                            for task in sorted(done, key=tasks.get):
+                                page = tasks[task]
+                                if task.cancelled() or page > stop_page:
+                                    continue
+                                data = task.result()
+                                if data is None:
+                                    continue
+                                pages_fetched += 1
+                                results = data.get("results", [])
+                                inserted = await asyncio.to_thread(save_page, conn, search_id, results, request.country)
+                                jobs_saved += inserted
+                                if not results or (request.stop_on_known and inserted < len(results)):
+                                    stop_page = page
+                                    stopped_early = bool(results)
+                                    for other in pending:
+                                        if tasks[other] > stop_page:
+                                            other.cancel()
+                    finally:
+                        for task in tasks:
+                            task.cancel()
+                        await asyncio.gather(*tasks, return_exceptions=True)
+            finally:
+                conn.close()
 
         return {
             "search_id": search_id,
-            "total_results": data.get("count", 0),
-            "mean_salary": data.get("mean", 0),
-            "results_returned": len(data.get("results", [])),
+            "total_results": first.get("count", 0),
+            "mean_salary": first.get("mean", 0),
+            "pages_fetched": pages_fetched,
             "jobs_saved": jobs_saved,
-            "results": data.get("results", [])
+            "stopped_early": stopped_early,
         }
 
     except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=e.response.status_code, detail=f"Adzuna API error: {e.response.text}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Crawl failed: {str(e)}")
 
 
 @app.get("/searches")
 def get_searches(limit: int = Query(default=10, le=100)):
     """Get recent job searches."""
+    try:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            prepared.execute(cur, "searches_recent", """
+                SELECT id, search_query, country, location, result_count, mean_salary, created_at
+                FROM job_searches
+                ORDER BY created_at DESC
+                LIMIT %s
+            """, (limit,))
+            columns = [col.name for col in cur.description]
+            searches = cur.fetchall()
+            cur.close()
+
+        return json_response(f'{{"searches":{rows_json(columns, searches)}}}')
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch searches: {str(e)}")
+
+
+@app.get("/refresh/runs")
+def get_refresh_runs(limit: int = Query(default=20, le=100)):
+    """Get recent background refresh runs."""
     try:
         conn = get_db_connection()
         cur = conn.cursor(cursor_factory=RealDictCursor)
 
         cur.execute("""
-            SELECT id, search_query, country, location, result_count, mean_salary, created_at
-            FROM job_searches
-            ORDER BY created_at DESC
+            SELECT r.id, r.search_id, s.search_query, s.country, s.location,
+                   r.started_at, r.duration_ms, r.jobs_fetched, r.new_jobs, r.error
+            FROM search_refresh_runs r
+            JOIN job_searches s ON s.id = r.search_id
+            ORDER BY r.started_at DESC
             LIMIT %s
         """, (limit,))
 
-        searches = cur.fetchall()
+        runs = cur.fetchall()
         cur.close()
         conn.close()
 
-        return {"searches": searches}
+        return {"runs": runs}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch searches: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch refresh runs: {str(e)}")
+
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+
+
+def encode_cursor(saved_at: datetime, job_pk: int) -> str:
+    """Opaque pagination cursor for the last row of a page."""
+    return base64.urlsafe_b64encode(f"{saved_at.isoformat()}|{job_pk}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Inverse of encode_cursor; raises 400 on anything malformed."""
+    try:
+        saved_at, job_pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(saved_at), int(job_pk)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def jobs_filter(search_id: Optional[int], after: Optional[tuple] = None, distinct: bool = False) -> tuple:
+    """WHERE clause and params shared by the job listing and export queries."""
+    clauses, params = [], []
+    if search_id:
+        clauses.append("search_id = %s")
+        params.append(search_id)
+    if distinct:
+        # Only the first posting of each near-duplicate cluster
+        clauses.append("cluster_id = job_id")
+    if after:
+        clauses.append("(saved_at, id) < (%s, %s)")
+        params.extend(after)
+    return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
 
 
 @app.get("/jobs")
-def get_jobs(search_id: Optional[int] = None, limit: int = Query(default=20, le=100)):
-    """Get saved jobs, optionally filtered by search_id."""
+def get_jobs(
+    search_id: Optional[int] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    distinct: bool = False,
+    fields: Optional[str] = None,
+):
+    """Get saved jobs, newest first, optionally filtered by search_id.
+
+    Pass the returned ``next_cursor`` as ``cursor`` to get the following page.
+    With ``distinct`` reposts of the same position are left out. ``fields``
+    limits the columns read and returned, e.g. ``fields=title,company``.
+    """
+    columns = job_fields(fields)
+    after = decode_cursor(cursor) if cursor else None
+    try:
+        with pooled_connection() as conn:
+            cur = conn.cursor()
+            where, params = jobs_filter(search_id, after, distinct)
+            # saved_at and id always come last, for the cursor; rows_json skips them
+            prepared.execute(cur, "jobs_page", f"""
+                SELECT {", ".join(columns)}, saved_at, id FROM jobs
+                {where}
+                ORDER BY saved_at DESC, id DESC
+                LIMIT %s
+            """, (*params, limit))
+            jobs = cur.fetchall()
+            cur.close()
+
+        next_cursor = None
+        if len(jobs) == limit:
+            next_cursor = encode_cursor(jobs[-1][-2], jobs[-1][-1])
+
+        return json_response(f'{{"jobs":{rows_json(columns, jobs)},"count":{len(jobs)},'
+                             f'"next_cursor":{json.dumps(next_cursor)}}}')
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch jobs: {str(e)}")
+
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> tuple:
+    """Lat/lon box enclosing a circle, used to narrow radius queries via the index.
+
+    Near the poles or across the antimeridian the longitude range is widened
+    to the full circle rather than split in two.
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return min_lat, max_lat, -180.0, 180.0
+    dlon = math.degrees(radius_km / (EARTH_RADIUS_KM * math.cos(math.radians(lat))))
+    if lon - dlon < -180.0 or lon + dlon > 180.0:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, lon - dlon, lon + dlon
+
+
+@app.get("/jobs/near")
+def get_jobs_near(
+    lat: float = Query(ge=-90, le=90),
+    lon: float = Query(ge=-180, le=180),
+    radius_km: float = Query(default=25, gt=0, le=1000),
+    limit: int = Query(default=20, ge=1, le=100),
+    distinct: bool = False,
+    fields: Optional[str] = None,
+):
+    """Get saved jobs within radius_km of a point, nearest first.
+
+    The bounding box of the circle is matched against the (latitude, longitude)
+    index, and only those candidates get the exact haversine distance.
+    """
+    columns = job_fields(fields)
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
     try:
         conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur = conn.cursor()
 
-        if search_id:
-            cur.execute("""
-                SELECT * FROM jobs
-                WHERE search_id = %s
-                ORDER BY saved_at DESC
-                LIMIT %s
-            """, (search_id, limit))
-        else:
-            cur.execute("""
-                SELECT * FROM jobs
-                ORDER BY saved_at DESC
-                LIMIT %s
-            """, (limit,))
+        where, params = jobs_filter(None, distinct=distinct)
+        where = (where + " AND " if where else "WHERE ") + """
+            latitude BETWEEN %s AND %s AND longitude BETWEEN %s AND %s
+            AND latitude IS NOT NULL AND longitude IS NOT NULL
+        """
+        cur.execute(f"""
+            SELECT * FROM (
+                SELECT {", ".join(columns)},
+                       2 * %s * asin(LEAST(1, sqrt(
+                           power(sin(radians(latitude - %s) / 2), 2) +
+                           cos(radians(%s)) * cos(radians(latitude)) *
+                           power(sin(radians(longitude - %s) / 2), 2)
+                       ))) AS distance_km
+                FROM jobs
+                {where}
+            ) candidates
+            WHERE distance_km <= %s
+            ORDER BY distance_km
+            LIMIT %s
+        """, (EARTH_RADIUS_KM, lat, lat, lon, *params, min_lat, max_lat, min_lon, max_lon, radius_km, limit))
 
         jobs = cur.fetchall()
         cur.close()
         conn.close()
 
-        return {"jobs": jobs, "count": len(jobs)}
+        return json_response(f'{{"jobs":{rows_json([*columns, "distance_km"], jobs)},"count":{len(jobs)}}}')
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch jobs: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch nearby jobs: {str(e)}")
 
 
-@app.get("/stats")
-def get_stats():
-    """Get statistics about saved jobs and searches."""
+@app.get("/jobs/search")
+def search_saved_jobs(
+    q: str = Query(min_length=1),
+    lang: Optional[str] = None,
+    search_id: Optional[int] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    fields: Optional[str] = None,
+):
+    """Full-text search over stored jobs, best matches first.
+
+    Jobs are indexed with the stemmer for the language of the country they were
+    found in. Without ``lang`` the query is parsed with every configured
+    language and the results are OR-ed, so it matches regardless of language.
+    """
+    languages = sorted(set(TEXT_SEARCH_LANGUAGES.values()) | {"simple"})
+    if lang:
+        if lang not in languages:
+            raise HTTPException(status_code=400, detail=f"Unsupported language, use one of: {', '.join(languages)}")
+        languages = [lang]
+
+    tsquery = " || ".join("websearch_to_tsquery(%s::regconfig, %s)" for _ in languages)
+    tsquery_params = [param for language in languages for param in (language, q)]
+    columns = job_fields(fields)
+
     try:
         conn = get_db_connection()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur = conn.cursor()
 
-        cur.execute("SELECT COUNT(*) as total_searches FROM job_searches")
-        total_searches = cur.fetchone()["total_searches"]
+        where, params = jobs_filter(search_id)
+        where = (where + " AND " if where else "WHERE ") + f"search_vector @@ ({tsquery})"
+        cur.execute(f"""
+            SELECT {", ".join(columns)}, ts_rank_cd(search_vector, {tsquery}) AS rank
+            FROM jobs
+            {where}
+            ORDER BY rank DESC, saved_at DESC
+            LIMIT %s
+        """, (*tsquery_params, *params, *tsquery_params, limit))
 
-        cur.execute("SELECT COUNT(*) as total_jobs FROM jobs")
-        total_jobs = cur.fetchone()["total_jobs"]
+        jobs = cur.fetchall()
+        cur.close()
+        conn.close()
 
-        cur.execute("""
-            SELECT AVG(salary_min) as avg_min_salary, AVG(salary_max) as avg_max_salary
-            FROM jobs
-            WHERE salary_min IS NOT NULL AND salary_max IS NOT NULL
-        """)
-        salary_stats = cur.fetchone()
+        return json_response(f'{{"jobs":{rows_json([*columns, "rank"], jobs)},"count":{len(jobs)}}}')
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search jobs: {str(e)}")
+
+
+def json_default(value):
+    """JSON encoder fallback matching FastAPI's datetime output."""
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+# Same output as FastAPI's JSONResponse, without going through jsonable_encoder
+row_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=json_default)
+
+
+def rows_json(columns: List[str], rows: List[tuple]) -> str:
+    """Encode tuple rows as a JSON array of objects keyed by columns.
+
+    Skips building a dict per row; columns beyond len(columns) are left out.
+    """
+    keys = [row_encoder.encode(column) + ":" for column in columns]
+    encode = row_encoder.encode
+    return "[" + ",".join(
+        "{" + ",".join(key + encode(value) for key, value in zip(keys, row)) + "}" for row in rows
+    ) + "]"
+
+
+def json_response(body: str) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
+def export_rows(search_id: Optional[int], fmt: str):
+    """Yield an export chunk per batch read from a server-side cursor."""
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor(name="jobs_export")
+        cur.itersize = EXPORT_BATCH_SIZE
+        where, params = jobs_filter(search_id)
+        cur.execute(f"""
+            SELECT {JOB_COLUMNS} FROM jobs
+            {where}
+            ORDER BY saved_at DESC, id DESC
+        """, params)
+
+        columns = None
+        while True:
+            batch = cur.fetchmany(EXPORT_BATCH_SIZE)
+            if columns is None:
+                columns = [col.name for col in cur.description]
+                if fmt == "csv":
+                    buffer = io.StringIO()
+                    csv.writer(buffer).writerow(columns)
+                    yield buffer.getvalue()
+            if not batch:
+                break
+
+            if fmt == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                for row in batch:
+                    writer.writerow(value.isoformat() if isinstance(value, datetime) else value for value in row)
+                yield buffer.getvalue()
+            else:
+                yield "".join(json.dumps(dict(zip(columns, row)), default=json_default) + "\n" for row in batch)
 
         cur.close()
+    finally:
+        conn.rollback()
         conn.close()
 
+
+@app.get("/jobs/export")
+def export_jobs(
+    search_id: Optional[int] = None,
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv)$"),
+):
+    """Stream all saved jobs as NDJSON or CSV in constant memory."""
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_rows(search_id, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=jobs.{format}"},
+    )
+
+
+def summarize_job_stats(row: dict) -> dict:
+    """Turn a job_stats row into counts and averages."""
+    salary_count = row.get("salary_count") or 0
+    return {
+        "jobs": row.get("row_count") or 0,
+        "positions": row.get("position_count") or 0,
+        "avg_min_salary": row["salary_min_sum"] / salary_count if salary_count else None,
+        "avg_max_salary": row["salary_max_sum"] / salary_count if salary_count else None,
+        "min_salary": row.get("salary_min"),
+        "max_salary": row.get("salary_max"),
+    }
+
+
+@app.get("/stats")
+def get_stats():
+    """Get statistics about saved jobs and searches.
+
+    Reads the running aggregates in job_stats, so the cost doesn't grow with
+    the number of stored jobs.
+    """
+    try:
+        with pooled_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            prepared.execute(cur, "job_stats", """
+                SELECT dimension, key, row_count, position_count, salary_count,
+                       salary_min_sum, salary_max_sum, salary_min, salary_max
+                FROM job_stats
+                ORDER BY dimension, row_count DESC
+            """)
+            rows = cur.fetchall()
+            cur.close()
+
+        total_searches = 0
+        overall = None
+        breakdowns = {"country": {}, "contract_type": {}, "contract_time": {}}
+        for row in rows:
+            if row["dimension"] == "searches":
+                total_searches = row["row_count"]
+            elif row["dimension"] == "total":
+                overall = row
+            elif row["dimension"] in breakdowns:
+                breakdowns[row["dimension"]][row["key"]] = summarize_job_stats(row)
+
+        summary = summarize_job_stats(overall) if overall else summarize_job_stats({})
         return {
             "total_searches": total_searches,
-            "total_jobs": total_jobs,
-            "avg_min_salary": salary_stats["avg_min_salary"],
-            "avg_max_salary": salary_stats["avg_max_salary"]
+            "total_jobs": summary["jobs"],
+            "total_positions": summary["positions"],
+            "avg_min_salary": summary["avg_min_salary"],
+            "avg_max_salary": summary["avg_max_salary"],
+            "min_salary": summary["min_salary"],
+            "max_salary": summary["max_salary"],
+            "by_country": breakdowns["country"],
+            "by_contract_type": breakdowns["contract_type"],
+            "by_contract_time": breakdowns["contract_time"],
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch stats: {str(e)}")
+
+
+salary_snapshot: Optional[salary.Snapshot] = None
+# Least recently used reports last; bounded, since the parameters come from the caller
+salary_reports: "OrderedDict[tuple, dict]" = OrderedDict()
+salary_reports_lock = threading.Lock()
+salary_lock = threading.Lock()
+
+
+def current_salary_snapshot() -> salary.Snapshot:
+    """Return the salary column snapshot, reloading it if jobs were added since.
+
+    The job count from job_stats acts as the snapshot version, and is only
+    checked once SALARY_SNAPSHOT_TTL has passed since the last check.
+    """
+    global salary_snapshot
+    with salary_lock:
+        now = time.monotonic()
+        if salary_snapshot and now - salary_snapshot.checked_at < SALARY_SNAPSHOT_TTL:
+            return salary_snapshot
+
+        conn = get_db_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT row_count FROM job_stats WHERE dimension = 'total'")
+            row = cur.fetchone()
+            version = row[0] if row else 0
+            cur.close()
+
+            if salary_snapshot and salary_snapshot.version == version:
+                salary_snapshot.checked_at = now
+                return salary_snapshot
+
+            cur = conn.cursor(name="salary_snapshot")
+            cur.itersize = 10000
+            cur.execute("""
+                SELECT j.salary_min, j.salary_max, j.cluster_id = j.job_id,
+                       s.country, j.location, j.contract_type, j.contract_time
+                FROM jobs j
+                LEFT JOIN job_searches s ON s.id = j.search_id
+                WHERE j.salary_min IS NOT NULL OR j.salary_max IS NOT NULL
+            """)
+            salary_snapshot = salary.build_snapshot(cur, version, now)
+            with salary_reports_lock:
+                salary_reports.clear()
+            cur.close()
+        finally:
+            conn.rollback()
+            conn.close()
+        return salary_snapshot
+
+
+@app.get("/stats/salary")
+def get_salary_stats(
+    metric: str = Query(default="mid", pattern="^(mid|min|max)$"),
+    bins: int = Query(default=20, ge=1, le=200),
+    top: int = Query(default=20, ge=1, le=500),
+    distinct: bool = False,
+):
+    """Salary percentiles, histogram and breakdowns by country, location and contract.
+
+    Computed with NumPy over a cached column snapshot; the last
+    SALARY_REPORT_CACHE_SIZE reports are memoized per snapshot, so repeated
+    calls cost a dictionary lookup.
+    """
+    try:
+        snapshot = current_salary_snapshot()
+        key = (snapshot.version, metric, bins, top, distinct)
+        with salary_reports_lock:
+            report = salary_reports.get(key)
+            if report is not None:
+                salary_reports.move_to_end(key)
+        if report is None:
+            report = salary.salary_report(snapshot, metric=metric, bins=bins, top=top, distinct=distinct)
+            with salary_reports_lock:
+                salary_reports[key] = report
+                while len(salary_reports) > SALARY_REPORT_CACHE_SIZE:
+                    salary_reports.popitem(last=False)
+
+        return {
+            **report,
+            "snapshot_jobs": len(snapshot.salary_min),
+            "snapshot_checked_seconds_ago": round(time.monotonic() - snapshot.checked_at, 1),
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch salary stats: {str(e)}")
@@ -0,0 +1,111 @@
+"""
+Prometheus metrics and query timing for freelance-radar.
+
+Request latency is recorded per route by the middleware in main.py. Time
+spent waiting on Adzuna and time spent in Postgres are recorded separately,
+so a slow `/search` can be attributed to one or the other. Every SQL
+statement goes through InstrumentedConnection, which times it and logs the
+statement text when it takes longer than SLOW_QUERY_MS. Prepared statements
+(app/prepared.py) are labelled and logged with their original SQL rather
+than as PREPARE/EXECUTE.
+"""
+
+import os
+import time
+
+import psycopg2.extensions
+from prometheus_client import Counter, Histogram
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_MAX_CHARS = 1000
+
+REQUEST_SECONDS = Histogram(
+    "freelance_radar_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+)
+ADZUNA_SECONDS = Histogram(
+    "freelance_radar_adzuna_request_duration_seconds",
+    "Time spent waiting on the Adzuna API, including streaming the body",
+    ["status"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+DB_QUERY_SECONDS = Histogram(
+    "freelance_radar_db_query_duration_seconds",
+    "SQL statement execution time by statement type",
+    ["operation"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+JOBS_INSERTED = Counter(
+    "freelance_radar_jobs_inserted_total",
+    "Jobs newly stored in Postgres (use rate() for rows per second)",
+)
+SLOW_QUERIES = Counter(
+    "freelance_radar_slow_queries_total",
+    "SQL statements slower than SLOW_QUERY_MS",
+    ["operation"],
+)
+
+
+def statement_operation(query) -> str:
+    """First keyword of a statement (SELECT, INSERT, WITH, ...), used as a label."""
+    if isinstance(query, bytes):
+        query = query.decode(errors="replace")
+    words = str(query).split(None, 1)
+    return words[0].upper() if words else "UNKNOWN"
+
+
+def record_query(query, seconds: float):
+    operation = statement_operation(query)
+    DB_QUERY_SECONDS.labels(operation).observe(seconds)
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        SLOW_QUERIES.labels(operation).inc()
+        if isinstance(query, bytes):
+            query = query.decode(errors="replace")
+        text = " ".join(str(query).split())
+        if len(text) > SLOW_QUERY_MAX_CHARS:
+            text = text[:SLOW_QUERY_MAX_CHARS] + "..."
+        print(f"Slow query ({seconds * 1000:.1f} ms): {text}")
+
+
+class TimedCursorMixin:
+    """Times execute/executemany of any psycopg2 cursor class.
+
+    ``logged_query`` is recorded in place of the statement actually sent,
+    e.g. the SQL behind an EXECUTE of a prepared statement.
+    """
+
+    def execute(self, query, vars=None, logged_query=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            record_query(logged_query or query, time.perf_counter() - started)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            record_query(query, time.perf_counter() - started)
+
+
+_timed_cursor_classes = {}
+
+
+def timed_cursor_class(cursor_class):
+    """Timed subclass of a cursor class (e.g. RealDictCursor), created once per class."""
+    timed = _timed_cursor_classes.get(cursor_class)
+    if timed is None:
+        timed = type(f"Timed{cursor_class.__name__}", (TimedCursorMixin, cursor_class), {})
+        _timed_cursor_classes[cursor_class] = timed
+    return timed
+
+
+class InstrumentedConnection(psycopg2.extensions.connection):
+    """Connection whose cursors, whatever their cursor_factory, are timed."""
+
+    def cursor(self, *args, **kwargs):
+        cursor_class = kwargs.get("cursor_factory") or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs["cursor_factory"] = timed_cursor_class(cursor_class)
+        return super().cursor(*args, **kwargs)
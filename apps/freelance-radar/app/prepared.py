@@ -0,0 +1,52 @@
+"""
+Server-side prepared statements for the hot read queries.
+
+psycopg2 sends every execute() as a plain query string, so Postgres parses
+and plans the /jobs, /searches and /stats queries again on every request.
+execute() here PREPAREs each distinct statement once per connection and runs
+EXECUTE afterwards, which skips parsing and (after a few runs) planning. It
+only pays off on connections that are reused, i.e. the ones from the pool in
+main.py.
+
+Statements are named after a hash of their SQL, so the variants of a query
+(different filters or projected columns) each get their own plan. Each
+connection keeps at most MAX_PER_CONNECTION of them; past that, statements
+run unprepared.
+
+The cursor must come from a metrics.InstrumentedConnection: PREPARE and
+EXECUTE are timed, labelled and slow-logged as the original SQL.
+"""
+
+import re
+import zlib
+
+MAX_PER_CONNECTION = 64
+
+_PLACEHOLDER = re.compile(r"%s")
+
+
+def positional(sql: str) -> str:
+    """Turn psycopg2 %s placeholders into the $1, $2, ... that PREPARE expects."""
+    numbers = iter(range(1, sql.count("%s") + 1))
+    return _PLACEHOLDER.sub(lambda _: f"${next(numbers)}", sql)
+
+
+def execute(cur, name: str, sql: str, params: tuple = ()):
+    """Run sql with params as a prepared statement on the cursor's connection."""
+    conn = cur.connection
+    prepared = getattr(conn, "prepared_statements", None)
+    if prepared is None:
+        prepared = conn.prepared_statements = set()
+
+    statement = f"{name}_{zlib.crc32(sql.encode()):08x}"
+    if statement not in prepared:
+        if len(prepared) >= MAX_PER_CONNECTION:
+            cur.execute(sql, params)
+            return
+        cur.execute(f"PREPARE {statement} AS {positional(sql)}", logged_query=sql)
+        prepared.add(statement)
+
+    if params:
+        cur.execute(f"EXECUTE {statement} ({', '.join(['%s'] * len(params))})", params, logged_query=sql)
+    else:
+        cur.execute(f"EXECUTE {statement}", logged_query=sql)
@@ -0,0 +1,137 @@
+"""
+Salary analytics over an in-memory column snapshot of the jobs table.
+
+Percentiles and histograms need every salary value, which is too slow to
+aggregate in Postgres on each request once the table holds millions of rows.
+Instead the salary columns and the categorical columns used for breakdowns
+are loaded once into NumPy arrays (categories encoded as integer codes), and
+all statistics are computed with vectorized operations over that snapshot.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+PERCENTILES = [10, 25, 50, 75, 90, 99]
+DIMENSIONS = ["country", "location", "contract_type", "contract_time"]
+METRICS = ["mid", "min", "max"]
+
+
+@dataclass
+class Snapshot:
+    """Column arrays for all jobs that have a salary."""
+
+    version: int
+    checked_at: float
+    salary_min: np.ndarray
+    salary_max: np.ndarray
+    is_position: np.ndarray
+    codes: Dict[str, np.ndarray] = field(default_factory=dict)
+    labels: Dict[str, List[str]] = field(default_factory=dict)
+
+
+def build_snapshot(rows: Iterable[Tuple], version: int, checked_at: float) -> Snapshot:
+    """Build a snapshot from (salary_min, salary_max, is_position, *DIMENSIONS) rows."""
+    salary_min, salary_max, is_position = [], [], []
+    lookups = {dimension: {} for dimension in DIMENSIONS}
+    codes = {dimension: [] for dimension in DIMENSIONS}
+
+    for row in rows:
+        salary_min.append(row[0])
+        salary_max.append(row[1])
+        is_position.append(bool(row[2]))
+        for dimension, value in zip(DIMENSIONS, row[3:]):
+            lookup = lookups[dimension]
+            codes[dimension].append(lookup.setdefault(value or "unknown", len(lookup)))
+
+    return Snapshot(
+        version=version,
+        checked_at=checked_at,
+        salary_min=np.array(salary_min, dtype=np.float64),
+        salary_max=np.array(salary_max, dtype=np.float64),
+        is_position=np.array(is_position, dtype=bool),
+        codes={dimension: np.array(codes[dimension], dtype=np.int32) for dimension in DIMENSIONS},
+        labels={dimension: list(lookups[dimension]) for dimension in DIMENSIONS},
+    )
+
+
+def salary_values(snapshot: Snapshot, metric: str) -> np.ndarray:
+    """Salary per job for the chosen metric; NaN where unknown.
+
+    ``mid`` is the midpoint of the range, or whichever bound is known.
+    """
+    if metric == "min":
+        return snapshot.salary_min
+    if metric == "max":
+        return snapshot.salary_max
+    both = ~np.isnan(snapshot.salary_min) & ~np.isnan(snapshot.salary_max)
+    return np.where(both, (snapshot.salary_min + snapshot.salary_max) / 2,
+                    np.fmax(snapshot.salary_min, snapshot.salary_max))
+
+
+def summarize(values: np.ndarray) -> dict:
+    """Count, mean and percentiles of a set of salaries."""
+    if not len(values):
+        return {"count": 0, "mean": None, "percentiles": {}}
+    points = np.percentile(values, PERCENTILES)
+    return {
+        "count": int(len(values)),
+        "mean": float(values.mean()),
+        "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, points)},
+    }
+
+
+def histogram(values: np.ndarray, bins: int) -> dict:
+    """Equal-width histogram between the 1st and 99th percentile (outliers clamped)."""
+    if not len(values):
+        return {"edges": [], "counts": []}
+    low, high = np.percentile(values, [1, 99])
+    if low == high:
+        high = low + 1
+    counts, edges = np.histogram(np.clip(values, low, high), bins=bins, range=(low, high))
+    return {"edges": edges.round(2).tolist(), "counts": counts.tolist()}
+
+
+def breakdown(values: np.ndarray, codes: np.ndarray, labels: List[str], top: int) -> Dict[str, dict]:
+    """Summaries for the `top` largest groups of a categorical dimension.
+
+    Sorting once by (group, salary) makes every group a contiguous, already
+    sorted slice, so no per-group filtering pass over the full array is needed.
+    """
+    if not len(values):
+        return {}
+    order = np.lexsort((values, codes))
+    sorted_values = values[order]
+    sorted_codes = codes[order]
+    counts = np.bincount(sorted_codes, minlength=len(labels))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    result = {}
+    for code in np.argsort(counts)[::-1][:top]:
+        if not counts[code]:
+            break
+        group = sorted_values[starts[code]:starts[code] + counts[code]]
+        result[labels[code]] = summarize(group)
+    return result
+
+
+def salary_report(snapshot: Snapshot, metric: str = "mid", bins: int = 20,
+                  top: int = 20, distinct: bool = False) -> dict:
+    """Full salary report: overall percentiles, histogram and breakdowns."""
+    values = salary_values(snapshot, metric)
+    mask = ~np.isnan(values)
+    if distinct:
+        mask &= snapshot.is_position
+    values = values[mask]
+
+    return {
+        "metric": metric,
+        "overall": summarize(values),
+        "histogram": histogram(values, bins),
+        "by": {
+            dimension: breakdown(values, snapshot.codes[dimension][mask], snapshot.labels[dimension], top)
+            for dimension in DIMENSIONS
+        },
+    }
+
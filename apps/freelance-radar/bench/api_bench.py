@@ -0,0 +1,365 @@
+"""
+HTTP benchmark for the freelance-radar API.
+
+Starts the app under uvicorn in a child process, with Adzuna replaced by a
+mock transport that serves adzuna_API_response.json (every call gets fresh job
+ids, so each /search really inserts rows), seeds a throwaway schema with
+growing numbers of jobs and measures throughput and latency percentiles of
+/search, /jobs, /searches and /stats at each size. Results are written as JSON
+tagged with the current commit, so runs can be compared across commits.
+
+Usage (needs the app requirements and either a Postgres reachable via the
+usual DATABASE_HOST / DATABASE_NAME / POSTGRES_USER / POSTGRES_PASSWORD
+variables, or --initdb with the Postgres server binaries on PATH):
+
+    python bench/api_bench.py --sizes 10000,100000,1000000 --output bench.json
+    python bench/api_bench.py --initdb --sizes 10000 --baseline bench.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_SCHEMA = "radar_bench_api"
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(BENCH_DIR, "..", "app")
+SAMPLE_RESPONSE = os.path.join(BENCH_DIR, "..", "..", "..", "adzuna_API_response.json")
+
+# Read by main.py at import time, in this process and in the server process:
+# every connection uses the bench schema, Adzuna "credentials" are present but
+# only ever reach the mock, and no background work competes with the requests
+BENCH_ENV = {
+    "PGOPTIONS": f"-c search_path={BENCH_SCHEMA}",
+    "ADZUNA_APP_ID": "bench",
+    "ADZUNA_API_KEY": "bench",
+    "ADZUNA_RATE_PER_MINUTE": "1000000",
+    "ADZUNA_BURST": "1000",
+    "INGEST_WORKERS": "0",
+    "REFRESH_INTERVAL_MINUTES": "0",
+}
+
+SEARCH_BODY = {"keywords": "devops", "country": "es", "location": "Madrid", "results_per_page": 50}
+
+# name -> (method, path, json body)
+ENDPOINTS = {
+    "search": ("POST", "/search?wait=true&include_results=false", SEARCH_BODY),
+    "jobs": ("GET", "/jobs?limit=20", None),
+    "jobs_by_search": ("GET", "/jobs?search_id=42&limit=20", None),
+    "jobs_distinct": ("GET", "/jobs?limit=20&distinct=true", None),
+    "searches": ("GET", "/searches?limit=10", None),
+    "stats": ("GET", "/stats", None),
+}
+
+PERCENTILES = [50, 90, 99, 99.9]
+
+
+def mock_adzuna_transport(sample_path: str = SAMPLE_RESPONSE, latency_ms: float = 0):
+    """httpx transport answering every Adzuna search with the sample response.
+
+    Results are repeated up to the requested results_per_page and get new ids
+    on every call, as if Adzuna kept returning new postings.
+    """
+    import httpx
+
+    with open(sample_path) as f:
+        sample = json.load(f)
+    ids = itertools.count(1)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        per_page = int(request.url.params.get("results_per_page", len(sample["results"])))
+        results = []
+        for job in itertools.islice(itertools.cycle(sample["results"]), per_page):
+            results.append({**job, "id": f"mock-{next(ids)}"})
+        return httpx.Response(200, json={**sample, "results": results})
+
+    return httpx.MockTransport(handler)
+
+
+def serve(port: int, latency_ms: float):
+    """Run the app with the mock Adzuna transport (server process entry point)."""
+    import httpx
+    import uvicorn
+
+    import main
+
+    transport = mock_adzuna_transport(latency_ms=latency_ms)
+    main.adzuna_client = lambda: httpx.AsyncClient(transport=transport, timeout=30.0)
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+def start_postgres(workdir: str, port: int) -> dict:
+    """Start a throwaway Postgres cluster listening only on a unix socket in workdir."""
+    data = os.path.join(workdir, "data")
+    subprocess.run(["initdb", "-D", data, "-U", "radar", "--auth=trust"],
+                   check=True, stdout=subprocess.DEVNULL)
+    subprocess.run(["pg_ctl", "-D", data, "-l", os.path.join(workdir, "postgres.log"), "-w",
+                    "-o", f"-p {port} -k {workdir} -c listen_addresses='' -c fsync=off", "start"],
+                   check=True, stdout=subprocess.DEVNULL)
+    return {"DATABASE_HOST": workdir, "PGPORT": str(port), "DATABASE_NAME": "postgres",
+            "POSTGRES_USER": "radar", "POSTGRES_PASSWORD": ""}
+
+
+def stop_postgres(workdir: str):
+    subprocess.run(["pg_ctl", "-D", os.path.join(workdir, "data"), "-m", "fast", "-w", "stop"],
+                   check=False, stdout=subprocess.DEVNULL)
+
+
+def reset_schema(conn, create: bool = True):
+    cur = conn.cursor()
+    cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+    if create:
+        cur.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+    conn.commit()
+    cur.close()
+
+
+def seed(main, conn, start: int, end: int, searches: int):
+    """Add jobs start+1..end spread over the seeded searches, then rebuild job_stats.
+
+    Every fifth job is a repost of the one before it, so distinct listings have
+    something to filter out.
+    """
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM job_searches")
+    missing = searches - cur.fetchone()[0]
+    if missing > 0:
+        cur.execute("""
+            INSERT INTO job_searches (search_query, country, location, result_count, mean_salary, created_at)
+            SELECT 'query ' || i, (ARRAY['us', 'gb', 'de', 'es'])[1 + i %% 4], NULL, 1000, 50000,
+                   NOW() - (i || ' minutes')::interval
+            FROM generate_series(1, %s) AS i
+        """, (missing,))
+    cur.execute("""
+        INSERT INTO jobs (search_id, job_id, title, description, company, location,
+                          salary_min, salary_max, contract_type, contract_time,
+                          redirect_url, created_date, saved_at, language, cluster_id,
+                          latitude, longitude, category_tag, category_label)
+        SELECT 1 + (i %% %s), 'bench-' || i, 'Job ' || i, repeat('lorem ipsum ', 40),
+               'Company ' || (i %% 5000), 'City ' || (i %% 300),
+               CASE WHEN i %% 3 = 0 THEN NULL ELSE 30000 + (i %% 50000) END,
+               CASE WHEN i %% 3 = 0 THEN NULL ELSE 60000 + (i %% 80000) END,
+               (ARRAY['permanent', 'contract'])[1 + i %% 2], (ARRAY['full_time', 'part_time'])[1 + i %% 2],
+               'https://example.com/' || i,
+               NOW() - (i || ' seconds')::interval,
+               NOW() - ((random() * 31536000)::int || ' seconds')::interval,
+               'english', 'bench-' || CASE WHEN i %% 5 = 0 THEN i - 1 ELSE i END,
+               35 + random() * 20, -10 + random() * 30, 'it-jobs', 'IT Jobs'
+        FROM generate_series(%s, %s) AS i
+    """, (searches, start + 1, end))
+    cur.execute("DELETE FROM job_stats")
+    cur.execute("INSERT INTO job_stats (dimension, key, row_count) SELECT 'searches', '', COUNT(*) FROM job_searches")
+    cur.execute(main.job_stats_rollup("jobs"))
+    conn.commit()
+    cur.execute("ANALYZE")
+    conn.commit()
+    cur.close()
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+async def measure(client, method: str, path: str, body, requests: int, concurrency: int) -> dict:
+    """Send `requests` requests from `concurrency` closed-loop clients."""
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(requests / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+    }
+    for p in PERCENTILES:
+        result[f"p{p:g}_ms"] = round(percentile(latencies, p) * 1000, 3)
+    result["max_ms"] = round(latencies[-1] * 1000, 3)
+    return result
+
+
+async def run_endpoints(base_url: str, names: list, requests: int, concurrency: int, warmup: int) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        results = {}
+        for name in names:
+            method, path, body = ENDPOINTS[name]
+            if warmup:
+                await measure(client, method, path, body, warmup, concurrency)
+            results[name] = await measure(client, method, path, body, requests, concurrency)
+            r = results[name]
+            print(f"  {name:15} {r['requests_per_second']:9.1f} req/s  p50 {r['p50_ms']:8.2f} ms"
+                  f"  p99 {r['p99_ms']:8.2f} ms  errors {r['errors']}")
+        return results
+
+
+def wait_for_server(port: int, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Benchmark server exited during startup")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("Benchmark server did not start listening")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BENCH_DIR, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: dict, baseline_path: str):
+    """Print throughput and p99 change per size and endpoint against an earlier run."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline.get('commit', 'unknown')[:12]}:")
+    for size, endpoints in results["sizes"].items():
+        for name, r in endpoints.items():
+            old = baseline.get("sizes", {}).get(size, {}).get(name)
+            if not old:
+                continue
+            rps = (r["requests_per_second"] / old["requests_per_second"] - 1) * 100
+            p99 = (r["p99_ms"] / old["p99_ms"] - 1) * 100 if old["p99_ms"] else 0
+            print(f"  {size:>8} {name:15} throughput {rps:+7.1f}%  p99 {p99:+7.1f}%")
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="Comma-separated job counts to seed and measure at")
+    parser.add_argument("--searches", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per endpoint and size")
+    parser.add_argument("--search-requests", type=int, default=200,
+                        help="Requests for /search, which inserts rows on every call")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--adzuna-latency-ms", type=float, default=0,
+                        help="Simulated Adzuna response time")
+    parser.add_argument("--initdb", action="store_true",
+                        help="Run against a throwaway local Postgres cluster instead of DATABASE_HOST")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Earlier --output file to compare against")
+    parser.add_argument("--keep", action="store_true", help="Keep the bench schema afterwards")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.environ.update(BENCH_ENV)
+    sys.path.insert(0, APP_DIR)
+    if args.serve:
+        serve(args.serve, args.adzuna_latency_ms)
+        return
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    names = [name.strip() for name in args.endpoints.split(",")]
+    unknown = set(names) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix="radar-bench-") if args.initdb else None
+    if workdir:
+        os.environ.update(start_postgres(workdir, free_port()))
+
+    import main
+
+    conn = server = None
+    try:
+        conn = main.get_db_connection()
+        reset_schema(conn)
+        main.init_db()
+
+        port = free_port()
+        server = subprocess.Popen([sys.executable, __file__, "--serve", str(port),
+                                   "--adzuna-latency-ms", str(args.adzuna_latency_ms)])
+        wait_for_server(port, server)
+
+        results = {
+            "commit": git_commit(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "settings": {key: getattr(args, key) for key in
+                         ("searches", "requests", "search_requests", "concurrency", "warmup", "adzuna_latency_ms")},
+            "sizes": {},
+        }
+        seeded = 0
+        for size in sizes:
+            print(f"\nSeeding to {size} jobs...")
+            seed(main, conn, seeded, size, args.searches)
+            seeded = size
+            results["sizes"][str(size)] = asyncio.run(run_endpoints(
+                f"http://127.0.0.1:{port}",
+                [name for name in names if name != "search"],
+                args.requests, args.concurrency, args.warmup,
+            ))
+            # Last, since every /search adds rows on top of the seeded ones
+            if "search" in names:
+                results["sizes"][str(size)].update(asyncio.run(run_endpoints(
+                    f"http://127.0.0.1:{port}", ["search"],
+                    args.search_requests, args.concurrency, min(args.warmup, args.search_requests),
+                )))
+
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+        if args.baseline:
+            compare(results, args.baseline)
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+        if conn:
+            if not args.keep:
+                reset_schema(conn, create=False)
+            conn.close()
+        if workdir:
+            stop_postgres(workdir)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run()
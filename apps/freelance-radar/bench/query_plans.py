@@ -0,0 +1,155 @@
+"""
+Query plan benchmark for the freelance-radar list endpoints.
+
+Seeds a throwaway schema with a large `jobs` table, runs the queries behind
+`/jobs` and `/searches` with EXPLAIN ANALYZE, applies the schema migrations and
+runs them again, so the plan change from the indexes is visible.
+
+Usage (needs the app requirements and a Postgres reachable via the usual
+DATABASE_HOST / DATABASE_NAME / POSTGRES_USER / POSTGRES_PASSWORD variables):
+
+    python bench/query_plans.py --jobs 1000000 --searches 1000 --output plans.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+BENCH_SCHEMA = "radar_bench"
+
+# libpq picks this up for every connection, including the ones opened by main.py
+os.environ["PGOPTIONS"] = f"-c search_path={BENCH_SCHEMA}"
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+import main  # noqa: E402
+
+# The columns create_tables() makes; main.JOB_COLUMNS also lists columns that
+# only exist after run_migrations(), so the "before" run can't select them
+BASE_JOB_COLUMNS = """id, search_id, job_id, title, description, company, location,
+    salary_min, salary_max, contract_type, contract_time, redirect_url,
+    created_date, saved_at"""
+
+# Mirrors the SQL in get_jobs and get_searches
+QUERIES = {
+    "jobs_by_search": (f"""
+        SELECT {BASE_JOB_COLUMNS} FROM jobs
+        WHERE search_id = %s
+        ORDER BY saved_at DESC, id DESC
+        LIMIT %s
+    """, (42, 20)),
+    "jobs_recent": (f"""
+        SELECT {BASE_JOB_COLUMNS} FROM jobs
+        ORDER BY saved_at DESC, id DESC
+        LIMIT %s
+    """, (20,)),
+    "searches_recent": ("""
+        SELECT id, search_query, country, location, result_count, mean_salary, created_at
+        FROM job_searches
+        ORDER BY created_at DESC
+        LIMIT %s
+    """, (10,)),
+}
+
+
+def reset_schema(conn, create: bool = True):
+    cur = conn.cursor()
+    cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+    if create:
+        cur.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+    conn.commit()
+    cur.close()
+
+
+def seed(conn, jobs: int, searches: int):
+    cur = conn.cursor()
+    cur.execute("""
+        INSERT INTO job_searches (search_query, country, location, result_count, mean_salary, created_at)
+        SELECT 'query ' || i, 'us', NULL, 1000, 50000,
+               NOW() - (i || ' minutes')::interval
+        FROM generate_series(1, %s) AS i
+    """, (searches,))
+    cur.execute("""
+        INSERT INTO jobs (search_id, job_id, title, description, company, location,
+                          salary_min, salary_max, contract_type, contract_time,
+                          redirect_url, created_date, saved_at)
+        SELECT 1 + (i %% %s), 'bench-' || i, 'Job ' || i, repeat('lorem ipsum ', 40),
+               'Company ' || (i %% 5000), 'City ' || (i %% 300),
+               30000 + (i %% 50000), 60000 + (i %% 80000), 'contract', 'full_time',
+               'https://example.com/' || i,
+               NOW() - (i || ' seconds')::interval,
+               NOW() - ((random() * 31536000)::int || ' seconds')::interval
+        FROM generate_series(1, %s) AS i
+    """, (searches, jobs))
+    conn.commit()
+    cur.execute("ANALYZE")
+    conn.commit()
+    cur.close()
+
+
+def explain(conn) -> dict:
+    cur = conn.cursor()
+    plans = {}
+    for name, (sql, params) in QUERIES.items():
+        cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+        plan = cur.fetchone()[0][0]
+        plans[name] = {
+            "execution_ms": plan["Execution Time"],
+            "plan": summarize(plan["Plan"]),
+        }
+    conn.rollback()
+    cur.close()
+    return plans
+
+
+def summarize(node: dict) -> str:
+    """Flatten a plan tree into 'Limit -> Sort -> Seq Scan on jobs' form."""
+    label = node["Node Type"]
+    if "Index Name" in node:
+        label += f" using {node['Index Name']}"
+    elif "Relation Name" in node:
+        label += f" on {node['Relation Name']}"
+    children = node.get("Plans", [])
+    return label if not children else label + " -> " + summarize(children[0])
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--jobs", type=int, default=1_000_000)
+    parser.add_argument("--searches", type=int, default=1000)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--keep", action="store_true", help="Keep the bench schema afterwards")
+    args = parser.parse_args()
+
+    conn = main.get_db_connection()
+    reset_schema(conn)
+    try:
+        main.create_tables(conn)
+        print(f"Seeding {args.searches} searches and {args.jobs} jobs...")
+        seed(conn, args.jobs, args.searches)
+
+        before = explain(conn)
+        main.run_migrations(conn)
+        cur = conn.cursor()
+        cur.execute("ANALYZE")
+        conn.commit()
+        cur.close()
+        after = explain(conn)
+
+        for name in QUERIES:
+            print(f"\n{name}")
+            print(f"  before: {before[name]['execution_ms']:9.2f} ms  {before[name]['plan']}")
+            print(f"  after:  {after[name]['execution_ms']:9.2f} ms  {after[name]['plan']}")
+
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({"jobs": args.jobs, "searches": args.searches,
+                           "before": before, "after": after}, f, indent=2)
+    finally:
+        if not args.keep:
+            reset_schema(conn, create=False)
+        conn.close()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,117 @@
+"""
+Tests for the read connection pool and prepared statements (main.pooled_connection, app/prepared.py).
+
+psycopg2.connect is replaced by a fake connection that records the SQL sent
+on it, so no Postgres is needed.
+"""
+
+import zlib
+
+import psycopg2
+import psycopg2.extensions
+import pytest
+from prometheus_client import REGISTRY
+
+import main
+import metrics
+import prepared
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.connection = conn
+
+    def execute(self, query, vars=None):
+        self.connection.statements.append(query.split("(")[0].strip())
+
+
+class TimedFakeCursor(metrics.TimedCursorMixin, FakeCursor):
+    pass
+
+    def close(self):
+        pass
+
+
+class FakeInfo:
+    transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+
+class FakeConnection:
+    opened = []
+
+    def __init__(self, *args, **kwargs):
+        self.closed = 0
+        self.info = FakeInfo()
+        self.statements = []
+        FakeConnection.opened.append(self)
+
+    def cursor(self, *args, **kwargs):
+        return TimedFakeCursor(self)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    FakeConnection.opened = []
+    monkeypatch.setattr(psycopg2, "connect", FakeConnection)
+    monkeypatch.setattr(main, "db_pool", None)
+    yield main.get_db_pool()
+    main.db_pool.closeall()
+
+
+def test_pool_opens_all_connections_up_front(pool):
+    assert len(FakeConnection.opened) == main.DB_POOL_SIZE
+
+
+def test_returned_connections_stay_open_and_are_reused(pool):
+    used = []
+    for _ in range(5):
+        with main.pooled_connection() as conn:
+            used.append(conn)
+
+    assert len(set(map(id, used))) == 1
+    assert len(FakeConnection.opened) == main.DB_POOL_SIZE
+    assert not any(conn.closed for conn in FakeConnection.opened)
+
+
+def test_second_request_on_a_connection_only_executes(pool):
+    sql = "SELECT id FROM jobs WHERE search_id = %s LIMIT %s"
+    for _ in range(3):
+        with main.pooled_connection() as conn:
+            prepared.execute(conn.cursor(), "jobs_list", sql, (42, 20))
+
+    statement = f"jobs_list_{zlib.crc32(sql.encode()):08x}"
+    assert conn.statements == [
+        f"PREPARE {statement} AS SELECT id FROM jobs WHERE search_id = $1 LIMIT $2",
+        f"EXECUTE {statement}",
+        f"EXECUTE {statement}",
+        f"EXECUTE {statement}",
+    ]
+
+
+def test_positional_placeholders():
+    assert prepared.positional("a = %s AND b IN (%s, %s)") == "a = $1 AND b IN ($2, $3)"
+
+
+def query_count(operation):
+    return REGISTRY.get_sample_value("freelance_radar_db_query_duration_seconds_count", {"operation": operation}) or 0
+
+
+def test_prepared_statements_are_logged_as_their_sql(pool, monkeypatch, capsys):
+    monkeypatch.setattr(metrics, "SLOW_QUERY_MS", 0)
+    selects = query_count("SELECT")
+    sql = "SELECT id FROM jobs WHERE search_id = %s LIMIT %s"
+    for _ in range(2):
+        with main.pooled_connection() as conn:
+            prepared.execute(conn.cursor(), "jobs_list", sql, (42, 20))
+
+    logged = capsys.readouterr().out.splitlines()
+    assert len(logged) == 3
+    assert all(line.endswith("ms): " + sql) for line in logged)
+    assert query_count("SELECT") == selects + 3
+    assert query_count("PREPARE") == query_count("EXECUTE") == 0
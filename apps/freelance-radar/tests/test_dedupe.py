@@ -0,0 +1,133 @@
+"""
+Tests for near-duplicate detection (app/dedupe.py and main.cluster_jobs).
+"""
+
+import random
+
+import pytest
+
+import dedupe
+import main
+
+DESCRIPTION = (
+    "We are looking for a senior Python developer to join our platform team. "
+    "You will design and build data pipelines and REST APIs with FastAPI and PostgreSQL, "
+    "review code, mentor junior engineers and work closely with product and operations. "
+    "Experience with Docker, Kubernetes and cloud services is a plus. We offer remote work, "
+    "flexible hours, a yearly training budget and a friendly, international team based in Berlin "
+    "and Amsterdam. The role is a full-time permanent position with a competitive salary and "
+    "thirty days of paid holiday per year."
+)
+RUSSIAN_A = ("Разработчик Python", "ООО Ромашка", "Ищем опытного разработчика для создания веб-сервисов")
+RUSSIAN_B = ("Бухгалтер", "ИП Иванов", "Требуется бухгалтер со знанием налогового учета")
+
+
+def flip_bits(h, bits):
+    for bit in bits:
+        h ^= 1 << bit
+    return h
+
+
+class TestNormalize:
+    def test_lowercases_and_strips_accents_and_punctuation(self):
+        assert dedupe.normalize("Café-Manager (m/w/d), São Paulo!") == ["cafe", "manager", "m", "w", "d", "sao", "paulo"]
+
+    def test_keeps_non_latin_words(self):
+        assert dedupe.normalize("Разработчик Python, Москва") == ["разработчик", "python", "москва"]
+        assert dedupe.normalize("Μηχανικός λογισμικού") == ["μηχανικος", "λογισμικου"]
+        assert dedupe.normalize("软件 工程师") == ["软件", "工程师"]
+
+    def test_underscore_separates_words(self):
+        assert dedupe.normalize("snake_case id") == ["snake", "case", "id"]
+
+    @pytest.mark.parametrize("text", [None, "", "  -- !! --  "])
+    def test_no_words(self, text):
+        assert dedupe.normalize(text) == []
+
+
+class TestSimhash:
+    def test_same_text_same_hash(self):
+        a = dedupe.simhash("Senior Python Developer", "Acme", DESCRIPTION)
+        assert a == dedupe.simhash("senior python developer!", "ACME", DESCRIPTION.upper())
+        assert 0 <= a < 1 << 64
+
+    def test_small_edit_stays_within_max_distance(self):
+        a = dedupe.simhash("Senior Python Developer", "Acme", DESCRIPTION)
+        b = dedupe.simhash("Senior Python Developer", "Acme", DESCRIPTION + " Apply now.")
+        assert dedupe.distance(a, b) <= dedupe.MAX_DISTANCE
+
+    def test_different_postings_are_far_apart(self):
+        a = dedupe.simhash("Senior Python Developer", "Acme", DESCRIPTION)
+        b = dedupe.simhash("Accountant", "Globex", "Bookkeeping, payroll and tax returns for small clients.")
+        assert dedupe.distance(a, b) > dedupe.MAX_DISTANCE
+
+    def test_unrelated_non_latin_postings_differ(self):
+        a = dedupe.simhash(*RUSSIAN_A)
+        b = dedupe.simhash(*RUSSIAN_B)
+        assert a is not None and b is not None
+        assert dedupe.distance(a, b) > dedupe.MAX_DISTANCE
+
+    def test_no_words_has_no_hash(self):
+        assert dedupe.simhash(None, "", "!!!") is None
+
+    def test_signed_round_trip(self):
+        for h in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+            signed = dedupe.to_signed(h)
+            assert -(1 << 63) <= signed < 1 << 63
+            assert dedupe.to_unsigned(signed) == h
+
+
+class TestBands:
+    def test_bands_are_tagged_with_their_position(self):
+        assert dedupe.bands(0) == [i << dedupe.BAND_BITS for i in range(dedupe.BANDS)]
+        assert len(set(dedupe.bands(0x0001_0001_0001_0001))) == dedupe.BANDS
+
+    def test_hashes_within_max_distance_share_a_band(self):
+        rng = random.Random(42)
+        for _ in range(1000):
+            h = rng.getrandbits(64)
+            other = flip_bits(h, rng.sample(range(64), dedupe.MAX_DISTANCE))
+            assert set(dedupe.bands(h)) & set(dedupe.bands(other))
+
+    def test_one_flipped_bit_per_band_shares_none(self):
+        h = 0x1234_5678_9ABC_DEF0
+        other = flip_bits(h, [band * dedupe.BAND_BITS for band in range(dedupe.BANDS)])
+        assert not set(dedupe.bands(h)) & set(dedupe.bands(other))
+
+
+class FakeCursor:
+    """Answers cluster_jobs' candidate lookup from a list of stored (simhash, cluster_id)."""
+
+    def __init__(self, stored=()):
+        self.stored = list(stored)
+        self.bands = None
+
+    def execute(self, sql, params):
+        self.bands = set(params[0])
+
+    def fetchall(self):
+        return [
+            (signed, cluster_id) for signed, cluster_id in self.stored
+            if set(dedupe.bands(dedupe.to_unsigned(signed))) & self.bands
+        ]
+
+
+class TestClusterJobs:
+    def test_repost_joins_stored_cluster(self):
+        stored = dedupe.simhash("Senior Python Developer", "Acme", DESCRIPTION)
+        cur = FakeCursor([(dedupe.to_signed(stored), "job-1")])
+        [(_, _, cluster_id)] = main.cluster_jobs(cur, [("job-2", "Senior Python Developer", "Acme", DESCRIPTION)])
+        assert cluster_id == "job-1"
+
+    def test_near_duplicates_in_one_batch_share_a_cluster(self):
+        clusters = main.cluster_jobs(FakeCursor(), [
+            ("job-1", "Senior Python Developer", "Acme", DESCRIPTION),
+            ("job-2", "Senior Python Developer", "Acme", DESCRIPTION + " Apply now."),
+            ("job-3", *RUSSIAN_A),
+            ("job-4", *RUSSIAN_B),
+        ])
+        assert [cluster_id for _, _, cluster_id in clusters] == ["job-1", "job-1", "job-3", "job-4"]
+
+    def test_postings_without_words_are_their_own_cluster(self):
+        clusters = main.cluster_jobs(FakeCursor(), [("job-1", None, None, "!!!"), ("job-2", "", "", "")])
+        assert clusters == [(None, [], "job-1"), (None, [], "job-2")]
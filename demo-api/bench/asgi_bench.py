@@ -0,0 +1,100 @@
+"""
+In-process ASGI benchmark helper for the Demo API.
+
+Calls an ASGI app directly with synthetic requests, without a server or a
+socket in between, so the numbers reflect only the cost of the application
+code (routing, middleware, handlers, serialization). Used by the other
+scripts in this directory to compare two implementations of an endpoint.
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+
+def make_scope(path: str, method: str = "GET", query: bytes = b"",
+               headers: Optional[List[Tuple[bytes, bytes]]] = None) -> Dict[str, Any]:
+    """HTTP scope as uvicorn would build it for a plain request."""
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query,
+        "root_path": "",
+        "headers": headers if headers is not None else [
+            (b"host", b"localhost:8000"),
+            (b"user-agent", b"asgi-bench"),
+            (b"accept", b"*/*"),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+        "state": {},
+    }
+
+
+async def call(app: Callable, scope: Dict[str, Any], body: bytes = b"") -> Tuple[int, bytes]:
+    """Run one request through the app and return (status, body)."""
+    status = 0
+    chunks = []
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()  # Never disconnects
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(dict(scope), receive, send)
+    return status, b"".join(chunks)
+
+
+async def measure(app: Callable, scope: Dict[str, Any], requests: int = 20000,
+                  warmup: int = 1000, body: bytes = b"") -> Dict[str, float]:
+    """Send `requests` sequential requests and report throughput and latency."""
+    for _ in range(warmup):
+        await call(app, scope, body)
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        t0 = time.perf_counter_ns()
+        status, _ = await call(app, scope, body)
+        latencies.append(time.perf_counter_ns() - t0)
+        if status >= 400:
+            raise RuntimeError(f"{scope['path']} returned {status}")
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests_per_second": round(requests / elapsed, 1),
+        "mean_us": round(statistics.fmean(latencies) / 1000, 2),
+        "p50_us": round(latencies[len(latencies) // 2] / 1000, 2),
+        "p99_us": round(latencies[int(len(latencies) * 0.99) - 1] / 1000, 2),
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]]) -> None:
+    """Print results side by side, relative to the first entry."""
+    baseline = next(iter(results.values()))["requests_per_second"]
+    for name, r in results.items():
+        print(f"{name:>12}: {r['requests_per_second']:10.1f} req/s "
+              f"({r['requests_per_second'] / baseline:5.2f}x)  "
+              f"p50 {r['p50_us']:8.2f} us  p99 {r['p99_us']:8.2f} us")
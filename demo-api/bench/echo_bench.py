@@ -0,0 +1,85 @@
+"""
+Benchmark /echo: the plain ASGI endpoint against the FastAPI version.
+
+"before" is the previous implementation, which built a dict from the
+Request object and let FastAPI serialize it; "after" is main.app's /echo,
+which writes pre-encoded JSON from the ASGI scope. Both sit behind the same
+TimingMiddleware. The bodies are checked to match (apart from the
+timestamp) before timing. "after POST" streams a 4 KiB request body back.
+
+Usage:
+
+    python bench/echo_bench.py --requests 20000
+"""
+
+import argparse
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Dict
+
+from asgi_bench import call, compare, make_scope, measure
+
+import main
+from fastapi import FastAPI, Request
+
+before_app = FastAPI()
+before_app.add_middleware(main.TimingMiddleware)
+
+
+@before_app.get("/echo")
+async def echo_before(request: Request) -> Dict[str, Any]:
+    return {
+        "method": request.method,
+        "url": str(request.url),
+        "headers": dict(request.headers),
+        "client": {
+            "host": request.client.host if request.client else None,
+            "port": request.client.port if request.client else None,
+        },
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+async def check(scope: Dict[str, Any]) -> None:
+    """Fail if the two implementations answer differently."""
+    _, before = await call(before_app, scope)
+    _, after = await call(main.app, scope)
+    before, after = json.loads(before), json.loads(after)
+    before.pop("timestamp")
+    after.pop("timestamp")
+    if before != after:
+        raise SystemExit(f"Responses differ:\n  before: {before}\n  after:  {after}")
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    scope = make_scope("/echo", query=b"q=1", headers=[
+        (b"host", b"demo-api.k8s-demo.de"),
+        (b"user-agent", b"asgi-bench"),
+        (b"accept", b"*/*"),
+        (b"x-forwarded-for", b"203.0.113.7"),
+        (b"x-forwarded-proto", b"https"),
+        (b"x-request-id", b'quote"and\\backslash'),
+    ])
+    asyncio.run(check(scope))
+    asyncio.run(check(make_scope("/echo", headers=[])))
+
+    body = b"x" * 4096
+    post = make_scope("/echo", method="POST", headers=[
+        (b"host", b"localhost:8000"),
+        (b"content-type", b"text/plain"),
+        (b"content-length", str(len(body)).encode()),
+    ])
+    compare({
+        "before": asyncio.run(measure(before_app, scope, args.requests)),
+        "after": asyncio.run(measure(main.app, scope, args.requests)),
+        "after POST": asyncio.run(measure(main.app, post, args.requests, body=body)),
+    })
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,56 @@
+"""
+Benchmark /health: pure ASGI timing middleware against the previous one.
+
+"before" serves the same /health handler behind the previous
+@app.middleware("http") function (BaseHTTPMiddleware, wall-clock time.time());
+"after" is main.app with TimingMiddleware. Both feed the same metrics.
+
+Usage:
+
+    python bench/health_bench.py --requests 20000
+"""
+
+import argparse
+import asyncio
+import time
+
+from asgi_bench import compare, make_scope, measure
+
+import main
+import metrics
+from fastapi import FastAPI, Request
+
+before_app = FastAPI()
+before_app.get("/health")(main.health)
+
+
+@before_app.middleware("http")
+async def add_metrics(request: Request, call_next):
+    start_time = time.time()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        process_time = time.time() - start_time
+        route = request.scope.get("route")
+        metrics.observe_request(request.method, route.path if route else "unmatched", status, process_time)
+
+    response.headers["X-Process-Time"] = str(process_time)
+    return response
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    scope = make_scope("/health")
+    compare({
+        "before": asyncio.run(measure(before_app, scope, args.requests)),
+        "after": asyncio.run(measure(main.app, scope, args.requests)),
+    })
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,79 @@
+"""
+Benchmark /info: the pre-rendered response against the per-request version.
+
+"before" is the previous implementation, which collected the platform facts
+and built the response dict on every request; "after" is main.app's /info,
+which only fills uptime and current time into a body rendered at startup.
+
+Usage:
+
+    python bench/info_bench.py --requests 20000
+"""
+
+import argparse
+import asyncio
+import os
+import platform
+import socket
+import time
+from datetime import datetime
+from typing import Any, Dict
+
+from asgi_bench import compare, make_scope, measure
+
+import main
+from fastapi import FastAPI
+
+before_app = FastAPI()
+# Same middleware as main.app, so only the handlers differ
+before_app.add_middleware(main.TimingMiddleware)
+
+
+@before_app.get("/info")
+async def info_before() -> Dict[str, Any]:
+    return {
+        "application": {
+            "name": main.APP_NAME,
+            "version": main.APP_VERSION,
+            "environment": main.ENVIRONMENT,
+        },
+        "system": {
+            "hostname": socket.gethostname(),
+            "platform": platform.system(),
+            "platform_release": platform.release(),
+            "platform_version": platform.version(),
+            "architecture": platform.machine(),
+            "processor": platform.processor(),
+            "python_version": platform.python_version(),
+        },
+        "runtime": {
+            "uptime_seconds": round(time.time() - main.START_TIME, 2),
+            "start_time": datetime.fromtimestamp(main.START_TIME).isoformat(),
+            "current_time": datetime.utcnow().isoformat(),
+        },
+        "environment_variables": {
+            "PORT": main.PORT,
+            "LOG_LEVEL": main.LOG_LEVEL,
+            "ENVIRONMENT": main.ENVIRONMENT,
+            "KUBERNETES_SERVICE_HOST": os.getenv("KUBERNETES_SERVICE_HOST", "not set"),
+            "POD_NAME": os.getenv("POD_NAME", "not set"),
+            "POD_NAMESPACE": os.getenv("POD_NAMESPACE", "not set"),
+            "NODE_NAME": os.getenv("NODE_NAME", "not set"),
+        },
+    }
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    scope = make_scope("/info")
+    compare({
+        "before": asyncio.run(measure(before_app, scope, args.requests)),
+        "after": asyncio.run(measure(main.app, scope, args.requests)),
+    })
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,374 @@
+"""
+HTTP load generator for demo-api and the other apps in the cluster.
+
+Sends a weighted mix of requests over a pooled, keep-alive HTTP client and
+reports throughput and latency percentiles per target and overall.
+
+Two modes:
+
+- closed loop (default): --concurrency clients each send their next request
+  as soon as the previous one finished. Measures maximum throughput.
+- open loop (--rate N): requests are scheduled at a fixed N per second,
+  independent of how fast the server answers; at most --concurrency are in
+  flight. Latency is measured from the time a request was *scheduled*, not
+  sent, so a stalled server shows up as high latency for every request that
+  had to wait (no coordinated omission). The uncorrected send-to-response
+  time is reported separately as service time.
+
+Latencies are kept in an HdrHistogram-style log-linear histogram (about
+0.05% precision, constant memory), and written as JSON and/or CSV.
+
+Usage:
+
+    python bench/loadgen.py --preset demo-api --base-url https://demo-api.k8s-demo.de \\
+        --rate 200 --duration 60 --json results.json --csv results.csv
+    python bench/loadgen.py http://localhost:8000/health http://localhost:8000/info:3 \\
+        --concurrency 64 --duration 30
+    python bench/loadgen.py --scenario scenario.json --rate 50
+
+A scenario file looks like:
+
+    {"base_url": "https://demo-api.k8s-demo.de",
+     "targets": [{"path": "/health", "weight": 5},
+                 {"name": "echo-post", "method": "POST", "path": "/echo", "body": "{}",
+                  "headers": {"content-type": "application/json"}}]}
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+PRESETS = {
+    "demo-api": ["/", "/health", "/ready", "/echo", "/info"],
+}
+
+REPORT_PERCENTILES = [50, 75, 90, 95, 99, 99.9, 99.99, 100]
+DISTRIBUTION_PERCENTILES = [0, 10, 20, 30, 40, 50, 55, 60, 65, 70, 75, 80, 85, 90, 92.5, 95,
+                            96.25, 97.5, 98.125, 99, 99.5, 99.75, 99.9, 99.99, 99.999, 100]
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of integer microsecond values.
+
+    Like HdrHistogram, values are grouped into buckets whose width is a fixed
+    fraction (2^-PRECISION_BITS) of their magnitude, so percentiles keep the
+    same relative precision from microseconds to minutes while memory only
+    grows with the number of distinct buckets.
+    """
+
+    PRECISION_BITS = 11
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.sum = 0
+
+    def bucket(self, value: int) -> int:
+        shift = max(0, value.bit_length() - self.PRECISION_BITS)
+        return (value >> shift) << shift
+
+    def record(self, value_us: int) -> None:
+        key = self.bucket(value_us)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.total += 1
+        self.sum += value_us
+        self.max = max(self.max, value_us)
+        self.min = value_us if self.min is None else min(self.min, value_us)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def percentiles(self, points: List[float]) -> Dict[float, int]:
+        """Value at each percentile (upper end of its bucket, capped at max)."""
+        result = {}
+        if not self.total:
+            return {p: 0 for p in points}
+        keys = sorted(self.counts)
+        targets = sorted(points)
+        seen = 0
+        i = 0
+        for p in targets:
+            rank = max(1, -(-self.total * p // 100))
+            while seen + self.counts[keys[i]] < rank:
+                seen += self.counts[keys[i]]
+                i += 1
+            key = keys[i]
+            upper = key + (1 << max(0, key.bit_length() - self.PRECISION_BITS)) - 1
+            result[p] = min(upper, self.max)
+        return result
+
+    def summary(self) -> Dict[str, float]:
+        points = self.percentiles(REPORT_PERCENTILES)
+        summary = {
+            "count": self.total,
+            "min_ms": (self.min or 0) / 1000,
+            "mean_ms": round(self.sum / self.total / 1000, 3) if self.total else 0,
+        }
+        for p in REPORT_PERCENTILES:
+            summary["max_ms" if p == 100 else f"p{p:g}_ms"] = points[p] / 1000
+        return summary
+
+
+@dataclass
+class Target:
+    name: str
+    url: str
+    method: str = "GET"
+    weight: float = 1.0
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: Optional[str] = None
+
+
+@dataclass
+class Stats:
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    service: LatencyHistogram = field(default_factory=LatencyHistogram)
+    statuses: Dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+    bytes: int = 0
+
+
+def parse_targets(args) -> List[Target]:
+    """Targets from a scenario file, a preset, or URL[:weight] arguments."""
+    if args.scenario:
+        with open(args.scenario) as f:
+            scenario = json.load(f)
+        base_url = args.base_url or scenario.get("base_url", "")
+        return [
+            Target(
+                name=t.get("name") or f"{t.get('method', 'GET')} {t['path']}",
+                url=base_url + t["path"],
+                method=t.get("method", "GET"),
+                weight=t.get("weight", 1.0),
+                headers=t.get("headers", {}),
+                body=t.get("body"),
+            )
+            for t in scenario["targets"]
+        ]
+    if args.preset:
+        return [Target(name=path, url=args.base_url + path) for path in PRESETS[args.preset]]
+
+    targets = []
+    for spec in args.urls:
+        url, weight = split_weight(spec)
+        targets.append(Target(name=url, url=url, weight=weight))
+    return targets
+
+
+def split_weight(spec: str) -> Tuple[str, float]:
+    """Split "URL:weight" into URL and weight (1 without one).
+
+    Only a ":" after the start of the path counts, so the port in
+    "http://localhost:8000" is not taken for a weight.
+    """
+    scheme = spec.find("://")
+    path = spec.find("/", scheme + 3 if scheme >= 0 else 0)
+    colon = spec.rfind(":")
+    weight = spec[colon + 1:]
+    if path < 0 or colon < path or not weight.replace(".", "", 1).isdigit():
+        return spec, 1.0
+    return spec[:colon], float(weight)
+
+
+class LoadGenerator:
+    def __init__(self, targets: List[Target], client: httpx.AsyncClient, concurrency: int,
+                 duration: float, warmup: float):
+        self.targets = targets
+        self.weights = [t.weight for t in targets]
+        self.client = client
+        self.slots = asyncio.Semaphore(concurrency)
+        self.concurrency = concurrency
+        self.duration = duration
+        self.warmup = warmup
+        self.stats = {t.name: Stats() for t in targets}
+        self.started = 0.0
+
+    async def send(self, target: Target, scheduled: float) -> None:
+        """Send one request; latency counts from `scheduled`, service time from sending."""
+        async with self.slots:
+            sent = time.perf_counter()
+            status = 0
+            size = 0
+            try:
+                response = await self.client.request(target.method, target.url,
+                                                     headers=target.headers, content=target.body)
+                status = response.status_code
+                size = len(response.content)
+            except httpx.HTTPError:
+                pass
+            done = time.perf_counter()
+
+        if scheduled - self.started < self.warmup:
+            return
+        stats = self.stats[target.name]
+        stats.latency.record(int((done - scheduled) * 1_000_000))
+        stats.service.record(int((done - sent) * 1_000_000))
+        key = str(status) if status else "error"
+        stats.statuses[key] = stats.statuses.get(key, 0) + 1
+        stats.bytes += size
+        if not status or status >= 500:
+            stats.errors += 1
+
+    def pick(self) -> Target:
+        return random.choices(self.targets, self.weights)[0]
+
+    async def closed_loop(self) -> None:
+        end = self.started + self.warmup + self.duration
+
+        async def client_loop():
+            while time.perf_counter() < end:
+                await self.send(self.pick(), time.perf_counter())
+
+        await asyncio.gather(*(client_loop() for _ in range(self.concurrency)))
+
+    async def open_loop(self, rate: float) -> None:
+        """Schedule requests at a fixed rate, whether or not earlier ones finished."""
+        total = int((self.warmup + self.duration) * rate)
+        pending = set()
+        for i in range(total):
+            scheduled = self.started + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(self.send(self.pick(), scheduled))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        await asyncio.gather(*pending)
+
+    async def run(self, rate: Optional[float]) -> float:
+        self.started = time.perf_counter()
+        if rate:
+            await self.open_loop(rate)
+        else:
+            await self.closed_loop()
+        return time.perf_counter() - self.started - self.warmup
+
+
+def report(generator: LoadGenerator, elapsed: float, args) -> Tuple[Dict, Dict[str, LatencyHistogram]]:
+    """Results as a JSON-ready dict, plus the latency histograms for the CSV output."""
+    overall = Stats()
+    targets = generator.stats
+    for stats in targets.values():
+        overall.latency.merge(stats.latency)
+        overall.service.merge(stats.service)
+        overall.errors += stats.errors
+        overall.bytes += stats.bytes
+        for status, count in stats.statuses.items():
+            overall.statuses[status] = overall.statuses.get(status, 0) + count
+
+    def describe(stats: Stats) -> Dict:
+        return {
+            "requests": stats.latency.total,
+            "errors": stats.errors,
+            "requests_per_second": round(stats.latency.total / elapsed, 2) if elapsed > 0 else 0,
+            "bytes_per_second": round(stats.bytes / elapsed) if elapsed > 0 else 0,
+            "statuses": stats.statuses,
+            "latency": stats.latency.summary(),
+            "service_time": stats.service.summary(),
+        }
+
+    result = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "settings": {
+            "mode": "open" if args.rate else "closed",
+            "rate": args.rate,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "overall": describe(overall),
+        "targets": {name: describe(stats) for name, stats in targets.items()},
+    }
+    return result, {"overall": overall.latency, **{name: stats.latency for name, stats in targets.items()}}
+
+
+def write_csv(path: str, histograms: Dict[str, LatencyHistogram]) -> None:
+    """Percentile distribution per target, in the spirit of HdrHistogram's output."""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["target", "percentile", "latency_ms", "total_count"])
+        for name, histogram in histograms.items():
+            values = histogram.percentiles(DISTRIBUTION_PERCENTILES)
+            for p in DISTRIBUTION_PERCENTILES:
+                writer.writerow([name, p, values[p] / 1000, histogram.total])
+
+
+def print_report(result: Dict) -> None:
+    settings = result["settings"]
+    print(f"\n{settings['mode']}-loop, concurrency {settings['concurrency']}"
+          + (f", rate {settings['rate']:g}/s" if settings["rate"] else "")
+          + f", {result['elapsed_seconds']:.1f}s measured")
+    print(f"{'target':30} {'req/s':>9} {'errors':>7} {'p50':>9} {'p90':>9} {'p99':>9} {'p99.9':>9} {'max':>9}")
+    for name, r in [*result["targets"].items(), ("overall", result["overall"])]:
+        lat = r["latency"]
+        print(f"{name[:30]:30} {r['requests_per_second']:9.1f} {r['errors']:7} "
+              f"{lat['p50_ms']:9.2f} {lat['p90_ms']:9.2f} {lat['p99_ms']:9.2f} "
+              f"{lat['p99.9_ms']:9.2f} {lat['max_ms']:9.2f}")
+    print("(latency in ms, measured from the scheduled send time)")
+
+
+async def main_async(args) -> Tuple[Dict, Dict[str, LatencyHistogram]]:
+    targets = parse_targets(args)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=args.timeout, verify=not args.insecure) as client:
+        generator = LoadGenerator(targets, client, args.concurrency, args.duration, args.warmup)
+        elapsed = await generator.run(args.rate)
+    return report(generator, elapsed, args)
+
+
+def run():
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[1],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("urls", nargs="*", help="Target URLs, optionally with :weight after the path")
+    parser.add_argument("--scenario", help="JSON scenario file with base_url and targets")
+    parser.add_argument("--preset", choices=sorted(PRESETS), help="Built-in set of paths")
+    parser.add_argument("--base-url", default="", help="Prefix for preset/scenario paths")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="Clients (closed loop) or max requests in flight (open loop)")
+    parser.add_argument("--rate", type=float, help="Requests per second; enables open-loop mode")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds run before measuring")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--insecure", action="store_true", help="Don't verify TLS certificates")
+    parser.add_argument("--json", help="Write results as JSON to this file")
+    parser.add_argument("--csv", help="Write the latency percentile distribution as CSV to this file")
+    args = parser.parse_args()
+
+    if not (args.urls or args.scenario or args.preset):
+        parser.error("give target URLs, --preset or --scenario")
+    if args.preset and not args.base_url:
+        parser.error("--preset needs --base-url")
+
+    result, histograms = asyncio.run(main_async(args))
+    print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.csv:
+        write_csv(args.csv, histograms)
+    if result["overall"]["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,93 @@
+"""
+Local stand-in for Tempo's OTLP/HTTP trace receiver.
+
+Accepts POST /v1/traces (protobuf, as sent by demo-api), prints one line per
+span and a running total. --delay and --status simulate a slow or failing
+collector, to check that demo-api keeps serving and drops spans instead.
+The tests in tests/test_tracing.py run it in a thread and read the received
+spans from Handler.received.
+
+Usage:
+
+    python bench/otlp_sink.py --port 4318
+    TRACING_ENABLED=true OTEL_EXPORTER_OTLP_ENDPOINT=http://localhost:4318 python src/main.py
+    curl -H "traceparent: 00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01" localhost:8000/work/sleep
+"""
+
+import argparse
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import (
+    ExportTraceServiceRequest,
+    ExportTraceServiceResponse,
+)
+
+
+def span_line(resource_attributes, span) -> str:
+    attributes = {a.key: a.value for a in span.attributes}
+    status = attributes.get("http.response.status_code")
+    return (
+        f"{span.trace_id.hex()} {span.span_id.hex()} parent={span.parent_span_id.hex() or '-':16} "
+        f"{(span.end_time_unix_nano - span.start_time_unix_nano) / 1e6:8.2f}ms "
+        f"{span.name} [{status.int_value if status else '-'}] "
+        f"{resource_attributes.get('service.instance.id', '')}"
+    )
+
+
+class Handler(BaseHTTPRequestHandler):
+    delay = 0.0
+    status = 200
+    spans = 0
+    # (resource attributes, span) for every span received
+    received = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("content-length", 0)))
+        if self.path != "/v1/traces":
+            self.send_error(404)
+            return
+        time.sleep(self.delay)
+        if self.status != 200:
+            self.send_error(self.status)
+            return
+
+        request = ExportTraceServiceRequest()
+        request.ParseFromString(body)
+        received = 0
+        for resource_spans in request.resource_spans:
+            resource_attributes = {a.key: a.value.string_value for a in resource_spans.resource.attributes}
+            for scope_spans in resource_spans.scope_spans:
+                for span in scope_spans.spans:
+                    Handler.received.append((resource_attributes, span))
+                    print(span_line(resource_attributes, span))
+                    received += 1
+        Handler.spans += received
+        print(f"-- batch of {received} span(s), {Handler.spans} total", flush=True)
+
+        response = ExportTraceServiceResponse().SerializeToString()
+        self.send_response(200)
+        self.send_header("content-type", "application/x-protobuf")
+        self.send_header("content-length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--port", type=int, default=4318)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--status", type=int, default=200, help="HTTP status to answer with")
+    args = parser.parse_args()
+
+    Handler.delay = args.delay
+    Handler.status = args.status
+    print(f"OTLP/HTTP sink on :{args.port}/v1/traces", flush=True)
+    ThreadingHTTPServer(("", args.port), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,183 @@
+"""
+Structured logging for the Demo API.
+
+Every log line on stdout is one JSON object (time, level, logger, message,
+pid and any extra fields), which Promtail ships to Loki unchanged and
+LogQL's `| json` turns into fields. LOG_FORMAT=text prints plain lines for
+local development instead.
+
+Records are formatted and written by a QueueListener on a background thread:
+the request path only puts the record into a queue. The queue holds at most
+LOG_QUEUE_SIZE records; if stdout can't keep up, further records are dropped
+(and counted) rather than blocking the event loop.
+
+The access log is written by main.TimingMiddleware through access(): one
+record per request with request ID, route, status and latency. 5xx responses
+(level error) and requests slower than ACCESS_LOG_SLOW_MS (level warning) are
+always logged; the others with probability ACCESS_LOG_SAMPLE_RATIO, and never
+for ACCESS_LOG_EXCLUDE_PATHS.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from opentelemetry import trace
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+ACCESS_LOG_SAMPLE_RATIO = float(os.getenv("ACCESS_LOG_SAMPLE_RATIO", "1.0"))
+ACCESS_LOG_SLOW_MS = float(os.getenv("ACCESS_LOG_SLOW_MS", "1000"))
+ACCESS_LOG_EXCLUDE_PATHS = frozenset(
+    path for path in os.getenv("ACCESS_LOG_EXCLUDE_PATHS", "/health,/ready,/metrics").split(",") if path
+)
+
+# ID of the request being handled; set by main.TimingMiddleware
+current_request_id: ContextVar[Optional[str]] = ContextVar("current_request_id", default=None)
+
+access_logger = logging.getLogger("demo_api.access")
+
+# Attributes every LogRecord has; anything else was passed as extra=
+# (uvicorn adds color_message, an ANSI-colored copy of the message)
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "color_message"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with extra= fields at the top level."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+            "pid": record.process,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and value is not None:
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Plain single-line output for a terminal, extra= fields as key=value."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        extra = " ".join(
+            f"{key}={value}" for key, value in vars(record).items()
+            if key not in _RECORD_ATTRIBUTES and value is not None
+        )
+        line = f"{self.formatTime(record)} {record.levelname:<7} {record.name}: {record.getMessage()}"
+        if extra:
+            line += f"  {extra}"
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks and does the expensive work elsewhere.
+
+    prepare() only resolves what has to be taken from the calling context
+    (message arguments, traceback, request and trace IDs); the JSON encoding
+    happens on the listener thread. When the queue is full the record is
+    dropped; the number dropped is reported with the next record that fits.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if getattr(record, "request_id", None) is None:
+            record.request_id = current_request_id.get()
+        span_context = trace.get_current_span().get_span_context()
+        if span_context.is_valid:
+            record.trace_id = format(span_context.trace_id, "032x")
+            record.span_id = format(span_context.span_id, "016x")
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.dropped:
+            record.dropped_before = self.dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        else:
+            self.dropped = 0
+
+
+def setup() -> None:
+    """Send all logging in this process, uvicorn's included, through the queue."""
+    global _listener
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+    atexit.register(shutdown)
+
+    root = logging.getLogger()
+    root.handlers[:] = [DroppingQueueHandler(log_queue)]
+    root.setLevel(LOG_LEVEL.upper())
+
+
+def shutdown() -> None:
+    """Write the records still queued and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def access(method: str, path: str, route: str, status: int, duration_ms: float,
+           client: Optional[str], user_agent: Optional[str], request_id: str) -> None:
+    """Log one finished request, subject to the access log sampling."""
+    if status >= 500:
+        level = logging.ERROR
+    elif duration_ms >= ACCESS_LOG_SLOW_MS:
+        level = logging.WARNING
+    elif path in ACCESS_LOG_EXCLUDE_PATHS:
+        return
+    elif ACCESS_LOG_SAMPLE_RATIO < 1.0 and random.random() >= ACCESS_LOG_SAMPLE_RATIO:
+        return
+    else:
+        level = logging.INFO
+    if not access_logger.isEnabledFor(level):
+        return
+    access_logger.log(
+        level, "%s %s %d", method, path, status,
+        extra={
+            "request_id": request_id,
+            "method": method,
+            "path": path,
+            "route": route,
+            "status": status,
+            "duration_ms": round(duration_ms, 3),
+            "client": client,
+            "user_agent": user_agent,
+        },
+    )
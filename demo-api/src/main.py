@@ -9,16 +9,27 @@ This application demonstrates best practices for cloud-native applications:
 - Graceful shutdown
 """
 
+import asyncio
+import json
+import logging
 import os
 import platform
 import socket
 import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Dict, Any
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Response
 from fastapi.responses import JSONResponse
-import uvicorn
+from starlette.routing import Match, Route
+
+import logs
+import metrics
+import readiness
+import serve
+import tracing
+import work
 
 # Application metadata
 APP_NAME = "demo-api"
@@ -29,30 +40,123 @@ START_TIME = time.time()
 PORT = int(os.getenv("PORT", "8000"))
 LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+ECHO_MAX_BODY_KB = int(os.getenv("ECHO_MAX_BODY_KB", "1024"))
+
+# Requests currently being handled by this worker process
+in_flight = 0
+# Longer incoming X-Request-ID headers are replaced by a generated ID
+MAX_REQUEST_ID_LENGTH = 128
+
+logger = logging.getLogger("demo_api")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application startup and graceful shutdown.
+
+    Shutdown runs after the server stopped accepting connections and waited
+    for open ones (see serve.py). Requests that are still unwinding, such as
+    cancelled streaming responses, get until GRACEFUL_TIMEOUT_SECONDS before
+    the worker exits.
+    """
+    tracing.setup(APP_NAME, APP_VERSION, ENVIRONMENT)
+    lag_monitor = asyncio.create_task(readiness.monitor_loop_lag())
+    logger.info("Worker started")
+    yield
+    lag_monitor.cancel()
+    deadline = time.monotonic() + serve.GRACEFUL_TIMEOUT_SECONDS
+    while in_flight and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    work.shutdown()
+    tracing.shutdown()
+    logger.info("Worker stopped", extra={"in_flight": in_flight})
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title=APP_NAME,
     version=APP_VERSION,
     description="A portable demo API for testing across different platforms",
+    lifespan=lifespan,
 )
 
-# Request counter for basic metrics
-request_count = 0
 
+class TimingMiddleware:
+    """
+    Pure ASGI middleware to time, count and log requests.
 
-@app.middleware("http")
-async def add_metrics(request: Request, call_next):
-    """Middleware to track request metrics."""
-    global request_count
-    request_count += 1
+    Unlike an @app.middleware("http") function it doesn't run the endpoint in
+    a separate task or wrap the response stream, and it uses the monotonic
+    perf_counter_ns clock. The time until the response headers go out is
+    reported in the X-Process-Time (seconds) and Server-Timing (milliseconds)
+    headers; the latency histogram and the access log get the time until the
+    last body chunk.
 
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
+    Each request keeps the X-Request-ID a client or proxy sent, or gets a
+    new one. It is returned in the response and added to every log
+    record written while the request is handled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        global in_flight
+        in_flight += 1
+        start = time.perf_counter_ns()
+        status = 500
+
+        request_id = user_agent = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id" and len(value) <= MAX_REQUEST_ID_LENGTH:
+                request_id = value.decode("latin-1")
+            elif name == b"user-agent":
+                user_agent = value.decode("latin-1")
+        if not request_id:
+            request_id = os.urandom(16).hex()
+        token = logs.current_request_id.set(request_id)
 
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed_ns = time.perf_counter_ns() - start
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"x-process-time", str(elapsed_ns / 1e9).encode()),
+                    (b"server-timing", f"app;dur={elapsed_ns / 1e6:.3f}".encode()),
+                    (b"x-request-id", request_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            in_flight -= 1
+            elapsed_ns = time.perf_counter_ns() - start
+            # The router stores the matched route in the scope; label by its
+            # template, not the raw path, to keep the number of series bounded
+            route = scope.get("route")
+            route_path = route.path if route else "unmatched"
+            metrics.observe_request(scope["method"], route_path, status, elapsed_ns / 1e9)
+            client = scope.get("client")
+            logs.access(
+                scope["method"], scope["path"], route_path, status, elapsed_ns / 1e6,
+                client[0] if client else None, user_agent, request_id,
+            )
+            logs.current_request_id.reset(token)
+
+
+app.add_middleware(TimingMiddleware)
+if tracing.TRACING_ENABLED:
+    # Added last, so it runs first and the span covers the timing middleware too
+    app.add_middleware(tracing.TracingMiddleware)
+app.include_router(work.router)
 
 
 @app.get("/")
@@ -80,37 +184,60 @@ async def health() -> Dict[str, str]:
 
 @app.get("/ready")
 async def ready() -> Dict[str, Any]:
-    """Readiness check endpoint for readiness probes."""
+    """
+    Readiness check endpoint for readiness probes.
+
+    Returns 503 once the worker got SIGTERM, so the pod leaves the Service
+    endpoints while it still serves the requests already routed to it, and
+    while the worker is saturated (see readiness.py).
+    """
     uptime_seconds = time.time() - START_TIME
+    if serve.draining.is_set():
+        return JSONResponse(
+            status_code=503,
+            content={"status": "draining", "uptime_seconds": round(uptime_seconds, 2)},
+        )
+    # in_flight includes this probe
+    is_ready, checks = readiness.check(in_flight - 1)
+    if not is_ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "overloaded", "uptime_seconds": round(uptime_seconds, 2), "checks": checks},
+        )
     return {
         "status": "ready",
         "uptime_seconds": round(uptime_seconds, 2),
         "timestamp": datetime.utcnow().isoformat(),
+        "checks": checks,
     }
 
 
 @app.get("/metrics")
-async def metrics() -> Dict[str, Any]:
-    """Basic metrics endpoint."""
-    uptime_seconds = time.time() - START_TIME
-    return {
-        "app_name": APP_NAME,
-        "app_version": APP_VERSION,
-        "requests_total": request_count,
-        "uptime_seconds": round(uptime_seconds, 2),
-        "timestamp": datetime.utcnow().isoformat(),
-    }
+async def prometheus_metrics() -> Response:
+    """
+    Prometheus metrics endpoint.
 
+    Request counts and latency histograms per method, route and status,
+    summed over all worker processes.
+    """
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
 
-@app.get("/info")
-async def info() -> Dict[str, Any]:
+
+# Placeholders for the per-request values in the pre-rendered /info body
+_UPTIME_MARK = "\x00uptime\x00"
+_NOW_MARK = "\x00now\x00"
+
+
+def _render_info() -> tuple:
     """
-    System and environment information endpoint.
+    Pre-render the /info response once per process.
 
-    Useful for verifying the app is running correctly on different platforms
-    and for debugging environment-specific issues.
+    Hostname, platform details and configuration don't change while the
+    process runs, so they are collected and JSON-encoded a single time (the
+    same encoding FastAPI's JSONResponse uses). The body is split around the
+    two runtime values, which info() fills in per request.
     """
-    return {
+    payload = {
         "application": {
             "name": APP_NAME,
             "version": APP_VERSION,
@@ -126,9 +253,9 @@ async def info() -> Dict[str, Any]:
             "python_version": platform.python_version(),
         },
         "runtime": {
-            "uptime_seconds": round(time.time() - START_TIME, 2),
+            "uptime_seconds": _UPTIME_MARK,
             "start_time": datetime.fromtimestamp(START_TIME).isoformat(),
-            "current_time": datetime.utcnow().isoformat(),
+            "current_time": _NOW_MARK,
         },
         "environment_variables": {
             "PORT": PORT,
@@ -141,25 +268,161 @@ async def info() -> Dict[str, Any]:
             "NODE_NAME": os.getenv("NODE_NAME", "not set"),
         },
     }
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    head, rest = body.split(json.dumps(_UPTIME_MARK))
+    middle, tail = rest.split(json.dumps(_NOW_MARK))
+    return head.encode(), (middle + '"').encode(), ('"' + tail).encode()
+
+
+INFO_HEAD, INFO_MIDDLE, INFO_TAIL = _render_info()
 
 
-@app.get("/echo")
-async def echo(request: Request) -> Dict[str, Any]:
+@app.get("/info")
+async def info() -> Response:
     """
-    Echo endpoint that returns information about the request.
+    System and environment information endpoint.
 
-    Useful for debugging reverse proxies, ingress controllers, and load balancers.
+    Useful for verifying the app is running correctly on different platforms
+    and for debugging environment-specific issues. Static facts are rendered
+    at startup; only uptime and current time are computed per request.
     """
-    return {
-        "method": request.method,
-        "url": str(request.url),
-        "headers": dict(request.headers),
+    return Response(
+        content=b"".join((
+            INFO_HEAD,
+            str(round(time.time() - START_TIME, 2)).encode(),
+            INFO_MIDDLE,
+            datetime.utcnow().isoformat().encode(),
+            INFO_TAIL,
+        )),
+        media_type="application/json",
+    )
+
+
+class AsgiRoute(Route):
+    """
+    Route to a plain ASGI function, bypassing FastAPI's request handling.
+
+    Like FastAPI's routes it records itself in the scope, so the timing and
+    tracing middleware see the route template.
+    """
+
+    def __init__(self, path: str, endpoint, methods: list):
+        super().__init__(path, endpoint, methods=methods, include_in_schema=False)
+        # Route would wrap a function as func(request) -> response
+        self.app = endpoint
+
+    def matches(self, scope):
+        match, child_scope = super().matches(scope)
+        if match != Match.NONE:
+            child_scope["route"] = self
+        return match, child_scope
+
+
+# Same output as FastAPI's JSONResponse, created once instead of per call
+_encode_json = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+_JSON_CONTENT_TYPE = (b"content-type", b"application/json")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _echo_json(scope) -> bytes:
+    """
+    The /echo response body, built straight from the ASGI scope.
+
+    Same content as serializing a dict of Request.method, str(request.url),
+    dict(request.headers) and request.client, but without creating the
+    Request, URL and Headers objects or running FastAPI's encoder.
+    """
+    headers = {}
+    for name, value in scope["headers"]:
+        key = name.decode("latin-1")
+        if key not in headers:  # First value wins, like dict(request.headers)
+            headers[key] = value.decode("latin-1")
+    scheme = scope.get("scheme", "http")
+    host = headers.get("host")
+    if host is None:
+        server_host, server_port = scope["server"]
+        host = server_host if _DEFAULT_PORTS.get(scheme) == server_port else f"{server_host}:{server_port}"
+    url = f"{scheme}://{host}{scope.get('root_path', '')}{scope['path']}"
+    if scope["query_string"]:
+        url += "?" + scope["query_string"].decode("latin-1")
+
+    client = scope.get("client")
+    return _encode_json({
+        "method": scope["method"],
+        "url": url,
+        "headers": headers,
         "client": {
-            "host": request.client.host if request.client else None,
-            "port": request.client.port if request.client else None,
+            "host": client[0] if client else None,
+            "port": client[1] if client else None,
         },
         "timestamp": datetime.utcnow().isoformat(),
-    }
+    }).encode()
+
+
+async def _send_json(send, status: int, body: bytes) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [_JSON_CONTENT_TYPE, (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _echo_body(scope, receive, send) -> None:
+    """Stream the request body back as it arrives, up to ECHO_MAX_BODY_KB."""
+    limit = ECHO_MAX_BODY_KB * 1024
+    length = None
+    content_type = b"application/octet-stream"
+    for name, value in scope["headers"]:
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"content-type":
+            content_type = value
+
+    if length is not None and length > limit:
+        await _send_json(send, 413, _encode_json({"detail": f"Body larger than {ECHO_MAX_BODY_KB} KiB"}).encode())
+        return
+
+    headers = [(b"content-type", content_type)]
+    if length is not None:
+        headers.append((b"content-length", str(length).encode()))
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    received = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+        chunk = message.get("body", b"")
+        received += len(chunk)
+        if received > limit:
+            # Chunked body over the limit: the status is already sent, so
+            # leave the response incomplete and uvicorn closes the connection
+            return
+        more = message.get("more_body", False)
+        await send({"type": "http.response.body", "body": chunk, "more_body": more})
+        if not more:
+            return
+
+
+async def echo(scope, receive, send) -> None:
+    """
+    Echo endpoint that returns information about the request.
+
+    Useful for debugging reverse proxies, ingress controllers, and load
+    balancers. GET returns method, URL, headers and client as JSON; POST, PUT
+    and PATCH stream the request body back unchanged.
+
+    A plain ASGI function rather than a FastAPI endpoint: it is called often
+    by load balancer tests, and skipping request parsing and response
+    encoding makes it about 1.5x as fast (bench/echo_bench.py).
+    """
+    if scope["method"] in ("GET", "HEAD"):
+        await _send_json(send, 200, _echo_json(scope))
+    else:
+        await _echo_body(scope, receive, send)
+
+
+app.router.routes.append(AsgiRoute("/echo", echo, methods=["GET", "POST", "PUT", "PATCH"]))
 
 
 @app.get("/version")
@@ -172,15 +435,11 @@ async def version() -> Dict[str, str]:
 
 
 if __name__ == "__main__":
-    print(f"Starting {APP_NAME} v{APP_VERSION}")
-    print(f"Environment: {ENVIRONMENT}")
-    print(f"Port: {PORT}")
-    print(f"Log level: {LOG_LEVEL}")
-
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=PORT,
-        log_level=LOG_LEVEL,
-        access_log=True,
+    logs.setup()
+    logger.info(
+        "Starting %s v%s", APP_NAME, APP_VERSION,
+        extra={"environment": ENVIRONMENT, "port": PORT, "log_level": LOG_LEVEL},
     )
+
+    metrics.reset_store()
+    serve.run()
@@ -0,0 +1,84 @@
+"""
+Prometheus metrics for the Demo API, safe to use with several uvicorn workers.
+
+Each worker process writes its samples to mmap-backed files in
+PROMETHEUS_MULTIPROC_DIR (prometheus_client's multiprocess mode), and
+/metrics aggregates the files of all workers at scrape time. Whichever
+worker answers the scrape, Prometheus sees the totals for the whole pod.
+
+PROMETHEUS_MULTIPROC_DIR must be set before prometheus_client is imported,
+so this module sets a default and should be imported before anything else
+that uses prometheus_client.
+"""
+
+import glob
+import os
+import tempfile
+
+MULTIPROC_DIR = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "demo-api-metrics"),
+)
+os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+REQUESTS_TOTAL = Counter(
+    "demo_api_requests_total",
+    "HTTP requests by method, route and status code",
+    ["method", "route", "status"],
+)
+REQUEST_DURATION = Histogram(
+    "demo_api_request_duration_seconds",
+    "HTTP request latency by method and route",
+    ["method", "route"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+# Per worker; a scrape reports the worst live worker (see mark_worker_dead)
+EVENT_LOOP_LAG = Gauge(
+    "demo_api_event_loop_lag_seconds",
+    "How late the event loop ran a timer in the last measurement",
+    multiprocess_mode="livemax",
+)
+
+
+def reset_store() -> None:
+    """
+    Remove sample files left over from a previous run.
+
+    Call once in the parent process before the workers start; otherwise
+    counters would continue from the values of the last run. Files of this
+    process (such as those of unlabelled metrics, created on import) are new
+    and stay.
+    """
+    own = f"_{os.getpid()}.db"
+    for path in glob.glob(os.path.join(MULTIPROC_DIR, "*.db")):
+        if not path.endswith(own):
+            os.remove(path)
+
+
+def mark_worker_dead(pid: int) -> None:
+    """Drop the live gauge samples of a worker that exited, so scrapes ignore it."""
+    multiprocess.mark_process_dead(pid, MULTIPROC_DIR)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    """Record one finished request."""
+    REQUESTS_TOTAL.labels(method, route, str(status)).inc()
+    REQUEST_DURATION.labels(method, route).observe(seconds)
+
+
+def render() -> bytes:
+    """Prometheus text exposition of the samples of all worker processes."""
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
@@ -0,0 +1,86 @@
+"""
+Readiness from saturation signals for the Demo API.
+
+/ready reports 503 not only while draining, but also while this worker is
+too busy to take more traffic, so Kubernetes sends new requests to other
+pods until it recovers:
+
+- event loop lag: a background task sleeps LOOP_LAG_INTERVAL_MS at a time
+  and measures how late it wakes up. Lag means callbacks wait for the CPU
+  or for blocking code; the highest lag of the last second must stay below
+  READY_MAX_LOOP_LAG_MS.
+- requests in flight in this worker must stay below READY_MAX_IN_FLIGHT
+  (0 turns the limit off).
+
+Both are plain reads of values that are kept up to date anyway; the result
+is still cached for READY_CACHE_MS, so probes from kubelet, load balancers
+and monitoring at any rate cost a dictionary lookup.
+
+Readiness applies per pod: if every pod is saturated at once, all of them
+leave the Service endpoints. Pick thresholds that mean "much worse than
+usual", and let the probe's failureThreshold absorb short spikes.
+"""
+
+import asyncio
+import collections
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import metrics
+
+READY_MAX_LOOP_LAG_MS = float(os.getenv("READY_MAX_LOOP_LAG_MS", "500"))
+READY_MAX_IN_FLIGHT = int(os.getenv("READY_MAX_IN_FLIGHT", "0"))
+READY_CACHE_MS = float(os.getenv("READY_CACHE_MS", "1000"))
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
+
+# Loop lag samples of the last second, in seconds
+_lag_samples = collections.deque([0.0], maxlen=max(1, round(1000 / LOOP_LAG_INTERVAL_MS)))
+_cached: Optional[Tuple[float, bool, Dict[str, Any]]] = None
+
+
+def loop_lag() -> float:
+    """Highest event loop lag of the last second, in seconds."""
+    return max(_lag_samples)
+
+
+async def monitor_loop_lag() -> None:
+    """Measure event loop lag until cancelled; run as a task in each worker."""
+    interval = LOOP_LAG_INTERVAL_MS / 1000
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - started - interval)
+        _lag_samples.append(lag)
+        metrics.EVENT_LOOP_LAG.set(lag)
+
+
+def check(in_flight: int) -> Tuple[bool, Dict[str, Any]]:
+    """
+    Whether this worker should get traffic, with the signals behind it.
+
+    in_flight counts the requests being handled, not including the caller's.
+    Computed at most once per READY_CACHE_MS.
+    """
+    global _cached
+    now = time.monotonic()
+    if _cached is not None and now - _cached[0] < READY_CACHE_MS / 1000:
+        return _cached[1], _cached[2]
+
+    lag_ms = loop_lag() * 1000
+    checks = {
+        "loop_lag_ms": {
+            "value": round(lag_ms, 2),
+            "limit": READY_MAX_LOOP_LAG_MS,
+            "ok": lag_ms < READY_MAX_LOOP_LAG_MS,
+        },
+        "in_flight": {
+            "value": in_flight,
+            "limit": READY_MAX_IN_FLIGHT or None,
+            "ok": not READY_MAX_IN_FLIGHT or in_flight < READY_MAX_IN_FLIGHT,
+        },
+    }
+    ready = all(c["ok"] for c in checks.values())
+    _cached = (now, ready, checks)
+    return ready, checks
@@ -0,0 +1,146 @@
+"""
+Serving mode for the Demo API: worker processes and graceful shutdown.
+
+`python src/main.py` runs WORKERS uvicorn processes. With REUSE_PORT each
+worker binds its own listening socket with SO_REUSEPORT and the kernel
+spreads incoming connections evenly across them; otherwise the parent binds
+one socket that all workers accept from. uvloop and httptools are used when
+installed (they come with uvicorn[standard]).
+
+On SIGTERM a worker first keeps serving for SHUTDOWN_DELAY_SECONDS while
+/ready reports 503, so Kubernetes takes the pod out of the Service endpoints
+before it stops accepting connections. It then stops listening and waits up
+to GRACEFUL_TIMEOUT_SECONDS for in-flight requests to finish. Both together
+must fit in the pod's terminationGracePeriodSeconds.
+"""
+
+import importlib.util
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from typing import List, Optional
+
+import uvicorn
+
+import logs
+import metrics
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+WORKERS = int(os.getenv("WORKERS", "1"))
+REUSE_PORT = os.getenv("REUSE_PORT", "true").lower() == "true" and hasattr(socket, "SO_REUSEPORT")
+SHUTDOWN_DELAY_SECONDS = float(os.getenv("SHUTDOWN_DELAY_SECONDS", "0"))
+GRACEFUL_TIMEOUT_SECONDS = float(os.getenv("GRACEFUL_TIMEOUT_SECONDS", "20"))
+
+LOOP = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+HTTP = "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+# Set in a worker once it got SIGTERM; /ready reports 503 from then on
+draining = threading.Event()
+
+logger = logging.getLogger("demo_api.serve")
+
+
+class GracefulServer(uvicorn.Server):
+    """uvicorn server that delays stopping by SHUTDOWN_DELAY_SECONDS after SIGTERM."""
+
+    def handle_exit(self, sig, frame):
+        if sig == signal.SIGTERM and SHUTDOWN_DELAY_SECONDS > 0 and not draining.is_set():
+            draining.set()
+            logger.info("SIGTERM received, draining for %gs", SHUTDOWN_DELAY_SECONDS)
+            timer = threading.Timer(SHUTDOWN_DELAY_SECONDS, super().handle_exit, (sig, frame))
+            timer.daemon = True
+            timer.start()
+            return
+        draining.set()
+        super().handle_exit(sig, frame)
+
+
+def reuse_port_socket() -> socket.socket:
+    """Listening socket that other processes can bind to the same port as well."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((HOST, PORT))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def config() -> uvicorn.Config:
+    return uvicorn.Config(
+        "main:app",
+        host=HOST,
+        port=PORT,
+        log_level=LOG_LEVEL,
+        # Logging is set up by logs.setup(); requests are logged by main.TimingMiddleware
+        log_config=None,
+        access_log=False,
+        loop=LOOP,
+        http=HTTP,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT_SECONDS,
+    )
+
+
+def run_worker(sock: Optional[socket.socket] = None) -> None:
+    """Serve in this process, on sock or on a socket of its own."""
+    logs.setup()
+    if sock is None and REUSE_PORT:
+        sock = reuse_port_socket()
+    # uvicorn raises SIGTERM again once it has shut down. With the default
+    # handler that kills the process before the log queue is written out.
+    signal.signal(signal.SIGTERM, lambda sig, frame: None)
+    try:
+        GracefulServer(config()).run(sockets=[sock] if sock else None)
+    finally:
+        logs.shutdown()
+
+
+def run() -> None:
+    """Run WORKERS worker processes, restarting any that die, until SIGTERM/SIGINT."""
+    logs.setup()
+    logger.info("Starting %d worker(s)", WORKERS, extra={"loop": LOOP, "http": HTTP, "reuse_port": REUSE_PORT})
+    if WORKERS <= 1:
+        run_worker()
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    shared = None if REUSE_PORT else config().bind_socket()
+
+    def start() -> multiprocessing.Process:
+        process = ctx.Process(target=run_worker, args=(shared,))
+        process.start()
+        return process
+
+    workers: List[multiprocessing.Process] = [start() for _ in range(WORKERS)]
+    stopping = threading.Event()
+
+    def stop(sig, frame):
+        stopping.set()
+        # SIGINT from a terminal already reaches the whole process group
+        if sig == signal.SIGTERM:
+            for process in workers:
+                if process.is_alive():
+                    os.kill(process.pid, sig)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while not stopping.wait(0.5):
+        for i, process in enumerate(workers):
+            if not process.is_alive() and not stopping.is_set():
+                logger.warning("Worker %d exited with code %s, restarting", process.pid, process.exitcode)
+                metrics.mark_worker_dead(process.pid)
+                workers[i] = start()
+
+    deadline = time.monotonic() + SHUTDOWN_DELAY_SECONDS + GRACEFUL_TIMEOUT_SECONDS + 5
+    for process in workers:
+        process.join(max(0.0, deadline - time.monotonic()))
+        if process.is_alive():
+            logger.warning("Worker %d did not stop in time, killing it", process.pid)
+            process.kill()
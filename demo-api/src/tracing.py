@@ -0,0 +1,144 @@
+"""
+OpenTelemetry tracing for the Demo API.
+
+With TRACING_ENABLED, every HTTP request (except the probe and metrics paths
+in TRACING_EXCLUDE_PATHS) becomes a server span. An incoming W3C
+`traceparent`/`tracestate` header makes it a child of the caller's trace, so
+traces continue through the ingress and other services.
+
+Spans are exported over OTLP/HTTP to OTEL_EXPORTER_OTLP_ENDPOINT (the
+in-cluster Tempo by default) by a background thread, in batches. The queue
+in front of it holds at most TRACING_QUEUE_SIZE spans; when the collector is
+slow or down, new spans are dropped instead of blocking requests or growing
+memory.
+
+TRACING_SAMPLE_RATIO decides which new traces are recorded. Requests that
+arrive with a traceparent follow the caller's sampling decision.
+"""
+
+import os
+
+from opentelemetry import context, trace
+from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://tempo.tempo.svc.cluster.local:4318")
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+TRACING_QUEUE_SIZE = int(os.getenv("TRACING_QUEUE_SIZE", "2048"))
+TRACING_BATCH_SIZE = int(os.getenv("TRACING_BATCH_SIZE", "512"))
+TRACING_EXPORT_INTERVAL_MS = int(os.getenv("TRACING_EXPORT_INTERVAL_MS", "5000"))
+TRACING_EXPORT_TIMEOUT_SECONDS = float(os.getenv("TRACING_EXPORT_TIMEOUT_SECONDS", "10"))
+TRACING_EXCLUDE_PATHS = frozenset(
+    path for path in os.getenv("TRACING_EXCLUDE_PATHS", "/health,/ready,/metrics").split(",") if path
+)
+
+propagator = TraceContextTextMapPropagator()
+_provider = None
+
+
+def setup(service_name: str, service_version: str, environment: str) -> None:
+    """Install the tracer provider and exporter in this process (once per worker)."""
+    global _provider
+    if not TRACING_ENABLED or _provider is not None:
+        return
+    resource = Resource.create({
+        "service.name": service_name,
+        "service.version": service_version,
+        "deployment.environment": environment,
+        "service.instance.id": f"{os.getenv('POD_NAME', 'local')}/{os.getpid()}",
+        "k8s.pod.name": os.getenv("POD_NAME", ""),
+        "k8s.namespace.name": os.getenv("POD_NAMESPACE", ""),
+        "k8s.node.name": os.getenv("NODE_NAME", ""),
+    })
+    _provider = TracerProvider(
+        resource=resource,
+        sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO)),
+    )
+    _provider.add_span_processor(BatchSpanProcessor(
+        OTLPSpanExporter(
+            endpoint=f"{OTLP_ENDPOINT.rstrip('/')}/v1/traces",
+            timeout=TRACING_EXPORT_TIMEOUT_SECONDS,
+        ),
+        max_queue_size=TRACING_QUEUE_SIZE,
+        max_export_batch_size=min(TRACING_BATCH_SIZE, TRACING_QUEUE_SIZE),
+        schedule_delay_millis=TRACING_EXPORT_INTERVAL_MS,
+    ))
+    trace.set_tracer_provider(_provider)
+
+
+def shutdown() -> None:
+    """Export the spans still queued and stop the exporter thread."""
+    global _provider
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware that runs each HTTP request in a server span.
+
+    The span is current while the endpoint runs, so spans started there
+    become its children. It is named after the matched route template
+    ("GET /work/cpu"), like the request metrics.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.tracer = trace.get_tracer("demo-api")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in TRACING_EXCLUDE_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        carrier = {}
+        for name, value in scope["headers"]:
+            if name == b"traceparent" or name == b"tracestate":
+                carrier[name.decode()] = value.decode("latin-1")
+        parent = propagator.extract(carrier) if carrier else None
+
+        method = scope["method"]
+        span = self.tracer.start_span(
+            method,
+            context=parent,
+            kind=SpanKind.SERVER,
+            attributes={
+                "http.request.method": method,
+                "url.path": scope["path"],
+                "url.scheme": scope.get("scheme", "http"),
+                "network.protocol.version": scope.get("http_version", "1.1"),
+            },
+        )
+        # Unsampled requests get a non-recording span: it still carries the
+        # trace context to child spans, and the calls below are no-ops
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = context.attach(trace.set_span_in_context(span))
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            context.detach(token)
+            route = scope.get("route")
+            if route is not None:
+                span.update_name(f"{method} {route.path}")
+                span.set_attribute("http.route", route.path)
+            span.set_attribute("http.response.status_code", status)
+            if status >= 500:
+                span.set_status(Status(StatusCode.ERROR))
+            span.end()
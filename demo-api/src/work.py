@@ -0,0 +1,161 @@
+"""
+Synthetic workload endpoints for benchmarking platforms and autoscaling.
+
+Each endpoint creates one kind of pressure, sized by a query parameter:
+
+- /work/cpu?ms=     busy CPU, run in a process pool so the event loop stays free
+- /work/alloc?mb=   allocate and touch memory, held for hold_ms
+- /work/io?kb=      write, fsync and read back a temporary file
+- /work/sleep?ms=   wait without using resources (latency / concurrency tests)
+- /work/payload?kb= stream a response body of the given size
+
+Limits (WORK_MAX_*) keep a single request from taking the pod down.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+
+WORK_MAX_MS = int(os.getenv("WORK_MAX_MS", "10000"))
+WORK_MAX_ALLOC_MB = int(os.getenv("WORK_MAX_ALLOC_MB", "100"))
+WORK_MAX_IO_KB = int(os.getenv("WORK_MAX_IO_KB", "102400"))
+WORK_MAX_PAYLOAD_KB = int(os.getenv("WORK_MAX_PAYLOAD_KB", "102400"))
+# Per uvicorn worker. os.cpu_count() would report the node's CPUs, not the pod's limit
+WORK_CPU_PROCESSES = int(os.getenv("WORK_CPU_PROCESSES", "1"))
+
+PAGE_SIZE = 4096
+CHUNK_SIZE = 64 * 1024
+# Reused for every /work/payload chunk, so streaming costs no allocations
+PAYLOAD_CHUNK = (b"0123456789abcdef" * (CHUNK_SIZE // 16))
+
+router = APIRouter(prefix="/work", tags=["work"])
+
+_cpu_pool: Optional[ProcessPoolExecutor] = None
+
+
+def cpu_pool() -> ProcessPoolExecutor:
+    """
+    Process pool for /work/cpu, started on first use.
+
+    Pods that never get /work/cpu requests don't pay for the extra
+    processes; the first request includes their startup time.
+    """
+    global _cpu_pool
+    if _cpu_pool is None:
+        # spawn, not fork: forking a process running an event loop and threads is unsafe
+        _cpu_pool = ProcessPoolExecutor(max_workers=WORK_CPU_PROCESSES, mp_context=get_context("spawn"))
+    return _cpu_pool
+
+
+def shutdown() -> None:
+    """Stop the CPU process pool, if it was started."""
+    global _cpu_pool
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown(wait=False, cancel_futures=True)
+        _cpu_pool = None
+
+
+def burn_cpu(ms: int) -> int:
+    """Hash in a loop for ms milliseconds of wall time; returns the rounds done."""
+    deadline = time.perf_counter() + ms / 1000
+    digest = b"demo-api"
+    rounds = 0
+    while time.perf_counter() < deadline:
+        for _ in range(1000):
+            digest = hashlib.sha256(digest).digest()
+        rounds += 1000
+    return rounds
+
+
+def allocate(mb: int, hold_ms: int) -> None:
+    """Allocate mb MiB, write to every page so it is really resident, and hold it."""
+    block = bytearray(mb * 1024 * 1024)
+    for offset in range(0, len(block), PAGE_SIZE):
+        block[offset] = 1
+    time.sleep(hold_ms / 1000)
+    del block
+
+
+def file_roundtrip(kb: int) -> None:
+    """Write kb KiB to a temporary file, fsync it, and read it back."""
+    with tempfile.TemporaryFile() as f:
+        remaining = kb * 1024
+        while remaining > 0:
+            remaining -= f.write(PAYLOAD_CHUNK[:min(CHUNK_SIZE, remaining)])
+        f.flush()
+        os.fsync(f.fileno())
+        f.seek(0)
+        while f.read(CHUNK_SIZE):
+            pass
+
+
+def result(kind: str, amount: int, started: float, **extra) -> Dict[str, Any]:
+    return {
+        "work": kind,
+        "amount": amount,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        "pid": os.getpid(),
+        **extra,
+    }
+
+
+@router.get("/cpu")
+async def work_cpu(ms: int = Query(default=100, ge=0, le=WORK_MAX_MS)) -> Dict[str, Any]:
+    """Burn `ms` milliseconds of CPU in the process pool."""
+    started = time.perf_counter()
+    rounds = await asyncio.get_running_loop().run_in_executor(cpu_pool(), burn_cpu, ms)
+    return result("cpu", ms, started, hash_rounds=rounds)
+
+
+@router.get("/alloc")
+async def work_alloc(
+    mb: int = Query(default=10, ge=0, le=WORK_MAX_ALLOC_MB),
+    hold_ms: int = Query(default=0, ge=0, le=WORK_MAX_MS),
+) -> Dict[str, Any]:
+    """Allocate and touch `mb` MiB of memory, keep it for `hold_ms`, then free it."""
+    started = time.perf_counter()
+    await asyncio.to_thread(allocate, mb, hold_ms)
+    return result("alloc", mb, started)
+
+
+@router.get("/io")
+async def work_io(kb: int = Query(default=1024, ge=0, le=WORK_MAX_IO_KB)) -> Dict[str, Any]:
+    """Write, fsync and read back `kb` KiB on local disk."""
+    started = time.perf_counter()
+    await asyncio.to_thread(file_roundtrip, kb)
+    return result("io", kb, started)
+
+
+@router.get("/sleep")
+async def work_sleep(ms: int = Query(default=100, ge=0, le=WORK_MAX_MS)) -> Dict[str, Any]:
+    """Respond after `ms` milliseconds without using CPU."""
+    started = time.perf_counter()
+    await asyncio.sleep(ms / 1000)
+    return result("sleep", ms, started)
+
+
+@router.get("/payload")
+async def work_payload(kb: int = Query(default=1024, ge=0, le=WORK_MAX_PAYLOAD_KB)) -> StreamingResponse:
+    """Stream a `kb` KiB response body in 64 KiB chunks."""
+    size = kb * 1024
+
+    async def chunks():
+        remaining = size
+        while remaining > 0:
+            chunk = PAYLOAD_CHUNK if remaining >= CHUNK_SIZE else PAYLOAD_CHUNK[:remaining]
+            remaining -= len(chunk)
+            yield chunk
+
+    return StreamingResponse(
+        chunks(),
+        media_type="application/octet-stream",
+        headers={"Content-Length": str(size)},
+    )
@@ -0,0 +1,128 @@
+"""
+Tests for the OpenTelemetry request spans (src/tracing.py).
+
+The app runs in a TestClient with tracing enabled and exports to
+bench/otlp_sink.py, a local OTLP/HTTP receiver running in a thread, so the
+spans are checked as Tempo would receive them.
+"""
+
+import os
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+# Read when tracing is imported, and main only installs the middleware if set
+os.environ["TRACING_ENABLED"] = "true"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+import otlp_sink  # noqa: E402
+import tracing  # noqa: E402
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_SPAN_ID = "00f067aa0ba902b7"
+TRACEPARENT = f"00-{TRACE_ID}-{PARENT_SPAN_ID}-01"
+
+# Small, so a stalled exporter fills the queue after a few requests
+QUEUE_SIZE = 16
+
+
+@pytest.fixture(scope="module")
+def sink():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), otlp_sink.Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="module")
+def client(sink):
+    # A tracer provider can only be installed once per process, so all tests
+    # share this one. Spans are only exported when a batch is full or on flush.
+    patch = pytest.MonkeyPatch()
+    patch.setattr(tracing, "OTLP_ENDPOINT", f"http://127.0.0.1:{sink.server_port}")
+    patch.setattr(tracing, "TRACING_SAMPLE_RATIO", 1.0)
+    patch.setattr(tracing, "TRACING_QUEUE_SIZE", QUEUE_SIZE)
+    patch.setattr(tracing, "TRACING_BATCH_SIZE", QUEUE_SIZE)
+    patch.setattr(tracing, "TRACING_EXPORT_INTERVAL_MS", 60_000)
+    with TestClient(main.app) as client:
+        yield client
+    patch.undo()
+
+
+@pytest.fixture(autouse=True)
+def received():
+    otlp_sink.Handler.received.clear()
+    otlp_sink.Handler.delay = 0.0
+    yield
+    otlp_sink.Handler.delay = 0.0
+
+
+def exported_spans():
+    """Flush the exporter and return the spans the sink has received."""
+    assert tracing._provider.force_flush()
+    return [span for _, span in otlp_sink.Handler.received]
+
+
+def attributes(span):
+    values = {}
+    for attribute in span.attributes:
+        value = attribute.value
+        values[attribute.key] = value.string_value if value.HasField("string_value") else value.int_value
+    return values
+
+
+def test_traceparent_becomes_parent_span(client):
+    response = client.get("/info", headers={"traceparent": TRACEPARENT})
+    assert response.status_code == 200
+
+    [span] = exported_spans()
+    assert span.trace_id.hex() == TRACE_ID
+    assert span.parent_span_id.hex() == PARENT_SPAN_ID
+    assert span.name == "GET /info"
+    assert attributes(span)["http.route"] == "/info"
+    assert attributes(span)["http.response.status_code"] == 200
+
+
+def test_request_without_traceparent_starts_a_trace(client):
+    client.get("/info")
+
+    [span] = exported_spans()
+    assert span.parent_span_id == b""
+    assert span.trace_id.hex() != TRACE_ID
+
+
+def test_asgi_route_gets_route_name(client):
+    client.post("/echo", content=b"hello", headers={"traceparent": TRACEPARENT})
+
+    [span] = exported_spans()
+    assert span.name == "POST /echo"
+    assert attributes(span)["http.route"] == "/echo"
+    assert span.parent_span_id.hex() == PARENT_SPAN_ID
+
+
+def test_excluded_paths_have_no_spans(client):
+    for path in ("/health", "/ready", "/metrics"):
+        client.get(path, headers={"traceparent": TRACEPARENT})
+
+    assert exported_spans() == []
+
+
+def test_slow_collector_drops_spans_without_blocking_requests(client):
+    otlp_sink.Handler.delay = 2.0
+    requests = 10 * QUEUE_SIZE
+    slowest = 0.0
+    for _ in range(requests):
+        started = time.perf_counter()
+        assert client.get("/info").status_code == 200
+        slowest = max(slowest, time.perf_counter() - started)
+
+    # The first full batch is stuck in the collector while the rest arrive
+    assert slowest < otlp_sink.Handler.delay / 2
+    otlp_sink.Handler.delay = 0.0
+    assert 0 < len(exported_spans()) < requests
@@ -0,0 +1,15 @@
+from . import readiness
+
+
+class InFlightMiddleware:
+    """Count the requests this process is handling, for the readiness check."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        readiness.request_started()
+        try:
+            return self.get_response(request)
+        finally:
+            readiness.request_finished()
@@ -0,0 +1,83 @@
+"""
+Readiness signals for the /ready/ probe.
+
+Checks whether this process can take more traffic:
+
+- database: runs SELECT 1 at most once per READY_DB_CHECK_INTERVAL seconds
+  and reuses the result in between, so probes don't add database load. While
+  one thread runs the check, other threads get the previous result instead
+  of waiting or starting another query.
+- in flight: requests being handled by this process (counted by
+  InFlightMiddleware) must stay below READY_MAX_IN_FLIGHT (0 = no limit).
+  Only meaningful with threaded workers; a sync gunicorn worker handles one
+  request at a time.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+_lock = threading.Lock()
+_db_check_lock = threading.Lock()
+_in_flight = 0
+_db_checked_at = None
+_db_ok = True
+_db_error = None
+
+
+def request_started():
+    global _in_flight
+    with _lock:
+        _in_flight += 1
+
+
+def request_finished():
+    global _in_flight
+    with _lock:
+        _in_flight -= 1
+
+
+def in_flight():
+    """Requests currently being handled by this process."""
+    return _in_flight
+
+
+def database_ok():
+    """Result of the last database check, running a new one if it is due."""
+    global _db_checked_at, _db_ok, _db_error
+    now = time.monotonic()
+    due = _db_checked_at is None or now - _db_checked_at >= settings.READY_DB_CHECK_INTERVAL
+    # Never queue up behind a check that is already running
+    if due and _db_check_lock.acquire(blocking=False):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            _db_ok, _db_error = True, None
+        except DatabaseError as exc:
+            # Only the exception type: the probe response is public
+            _db_ok, _db_error = False, type(exc).__name__
+        finally:
+            _db_checked_at = time.monotonic()
+            _db_check_lock.release()
+    return _db_ok, _db_error
+
+
+def check():
+    """Whether this process should get traffic, with the details per check."""
+    db_ok, db_error = database_ok()
+    # The probe itself is one of the requests in flight
+    current = max(0, in_flight() - 1)
+    limit = settings.READY_MAX_IN_FLIGHT
+    checks = {
+        'database': {'ok': db_ok, 'error': db_error},
+        'in_flight': {'ok': not limit or current < limit, 'value': current, 'limit': limit or None},
+    }
+    return all(c['ok'] for c in checks.values()), checks
+
+
+def reset():
+    """Forget the cached database result (used by tests)."""
+    global _db_checked_at, _db_ok, _db_error
+    _db_checked_at, _db_ok, _db_error = None, True, None
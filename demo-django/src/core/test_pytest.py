@@ -11,8 +11,12 @@ Key differences from Django's unittest:
 
 import pytest
 import json
+from django.db import OperationalError
 from django.urls import reverse
 
+from core import readiness
+from core.middleware import InFlightMiddleware
+
 
 # Pytest fixtures are reusable test setup functions
 # The 'client' fixture is provided by pytest-django
@@ -106,6 +110,76 @@ class TestReadyView:
         assert response.status_code == 405  # Method Not Allowed
 
 
+@pytest.fixture
+def fresh_readiness():
+    """Fixture that forgets cached readiness results before and after a test."""
+    readiness.reset()
+    yield
+    readiness.reset()
+
+
+class FailingConnection:
+    """Stand-in for django.db.connection whose cursor can't connect."""
+
+    def cursor(self):
+        raise OperationalError('connection refused')
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('fresh_readiness')
+class TestReadinessChecks:
+    """Tests for the saturation and database checks behind the ready endpoint."""
+
+    def test_ready_endpoint_reports_checks(self, client):
+        """Test that ready endpoint lists the database and in-flight checks."""
+        data = json.loads(client.get(reverse('ready')).content)
+        assert data['checks']['database']['ok'] is True
+        assert data['checks']['in_flight']['value'] == 0
+
+    def test_ready_endpoint_unavailable_without_database(self, client, monkeypatch):
+        """Test that ready endpoint returns 503 when the database check fails."""
+        monkeypatch.setattr(readiness, 'connection', FailingConnection())
+        response = client.get(reverse('ready'))
+        assert response.status_code == 503
+        data = json.loads(response.content)
+        assert data['status'] == 'unavailable'
+        assert data['checks']['database']['error'] == 'OperationalError'
+
+    def test_ready_endpoint_keeps_failure_until_next_check(self, client, monkeypatch):
+        """Test that a failed database check is cached like a successful one."""
+        monkeypatch.setattr(readiness, 'connection', FailingConnection())
+        client.get(reverse('ready'))
+        monkeypatch.undo()
+        assert client.get(reverse('ready')).status_code == 503
+
+    def test_ready_endpoint_recovers_after_interval(self, client, monkeypatch, settings):
+        """Test that ready endpoint recovers once the database is checked again."""
+        settings.READY_DB_CHECK_INTERVAL = 0
+        monkeypatch.setattr(readiness, 'connection', FailingConnection())
+        assert client.get(reverse('ready')).status_code == 503
+        monkeypatch.undo()
+        assert client.get(reverse('ready')).status_code == 200
+
+    def test_ready_endpoint_unavailable_when_saturated(self, client, monkeypatch, settings):
+        """Test that ready endpoint returns 503 at the in-flight limit."""
+        settings.READY_MAX_IN_FLIGHT = 2
+        # The probe itself plus two other requests
+        monkeypatch.setattr(readiness, 'in_flight', lambda: 3)
+        response = client.get(reverse('ready'))
+        assert response.status_code == 503
+        assert json.loads(response.content)['checks']['in_flight']['ok'] is False
+
+
+def test_in_flight_middleware_counts_requests():
+    """Test that InFlightMiddleware counts a request while it is handled."""
+    seen = []
+    middleware = InFlightMiddleware(lambda request: seen.append(readiness.in_flight()))
+    before = readiness.in_flight()
+    middleware(None)
+    assert seen == [before + 1]
+    assert readiness.in_flight() == before
+
+
 @pytest.mark.django_db
 class TestInfoView:
     """Tests for the system information endpoint."""
@@ -8,10 +8,15 @@ Django's TestCase is based on Python's unittest.TestCase but adds:
 - Assertion helpers specific to Django
 """
 
-from django.test import TestCase, Client
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 import json
 
+from core import readiness
+
 
 class HomeViewTestCase(TestCase):
     """Tests for the home view using Django's unittest framework."""
@@ -107,6 +112,65 @@ class ReadyViewTestCase(TestCase):
         self.assertEqual(response.status_code, 405)  # Method Not Allowed
 
 
+class ReadinessChecksTestCase(TestCase):
+    """Tests for the saturation and database checks behind the ready endpoint."""
+
+    def setUp(self):
+        """Set up test client and forget cached check results."""
+        self.client = Client()
+        readiness.reset()
+        self.addCleanup(readiness.reset)
+
+    def test_ready_endpoint_reports_checks(self):
+        """Test that ready endpoint lists the database and in-flight checks."""
+        response = self.client.get(reverse('ready'))
+        data = json.loads(response.content)
+        self.assertTrue(data['checks']['database']['ok'])
+        self.assertEqual(data['checks']['in_flight']['value'], 0)
+
+    def test_ready_endpoint_unavailable_without_database(self):
+        """Test that ready endpoint returns 503 when the database check fails."""
+        with mock.patch('core.readiness.connection') as connection:
+            connection.cursor.side_effect = OperationalError('connection refused')
+            response = self.client.get(reverse('ready'))
+        self.assertEqual(response.status_code, 503)
+        data = json.loads(response.content)
+        self.assertEqual(data['status'], 'unavailable')
+        self.assertEqual(data['checks']['database']['error'], 'OperationalError')
+
+    def test_ready_endpoint_caches_database_check(self):
+        """Test that repeated probes within the interval query the database once."""
+        with mock.patch('core.readiness.connection') as connection:
+            self.client.get(reverse('ready'))
+            self.client.get(reverse('ready'))
+        self.assertEqual(connection.cursor.call_count, 1)
+
+    @override_settings(READY_DB_CHECK_INTERVAL=0)
+    def test_ready_endpoint_rechecks_database_after_interval(self):
+        """Test that the database is checked again once the cached result expired."""
+        with mock.patch('core.readiness.connection') as connection:
+            self.client.get(reverse('ready'))
+            self.client.get(reverse('ready'))
+        self.assertEqual(connection.cursor.call_count, 2)
+
+    @override_settings(READY_MAX_IN_FLIGHT=2)
+    def test_ready_endpoint_unavailable_when_saturated(self):
+        """Test that ready endpoint returns 503 at the in-flight limit."""
+        # The probe itself plus two other requests
+        with mock.patch('core.readiness.in_flight', return_value=3):
+            response = self.client.get(reverse('ready'))
+        self.assertEqual(response.status_code, 503)
+        data = json.loads(response.content)
+        self.assertFalse(data['checks']['in_flight']['ok'])
+        self.assertEqual(data['checks']['in_flight']['limit'], 2)
+
+    def test_ready_endpoint_no_in_flight_limit_by_default(self):
+        """Test that the in-flight check passes when no limit is configured."""
+        with mock.patch('core.readiness.in_flight', return_value=100):
+            response = self.client.get(reverse('ready'))
+        self.assertEqual(response.status_code, 200)
+
+
 class InfoViewTestCase(TestCase):
     """Tests for the system information endpoint."""
 
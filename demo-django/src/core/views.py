@@ -4,6 +4,8 @@ from django.http import JsonResponse
 from django.shortcuts import render
 from django.views.decorators.http import require_http_methods
 
+from . import readiness
+
 
 def home(request):
     """Home page with basic info."""
@@ -22,9 +24,17 @@ def health(request):
 
 @require_http_methods(["GET"])
 def ready(request):
-    """Readiness probe endpoint for Kubernetes."""
-    # You can add database checks here if needed
-    return JsonResponse({'status': 'ready'})
+    """
+    Readiness probe endpoint for Kubernetes.
+
+    Returns 503 while the database is unreachable or this process has too
+    many requests in flight. The database check result is cached (see
+    core/readiness.py), so frequent probes don't add database load.
+    """
+    is_ready, checks = readiness.check()
+    if not is_ready:
+        return JsonResponse({'status': 'unavailable', 'checks': checks}, status=503)
+    return JsonResponse({'status': 'ready', 'checks': checks})
 
 
 @require_http_methods(["GET"])
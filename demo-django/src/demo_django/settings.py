@@ -33,6 +33,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.InFlightMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -108,5 +109,11 @@ STORAGES = {
     },
 }
 
+# Readiness probe (see core/readiness.py)
+# Seconds a database check result is reused
+READY_DB_CHECK_INTERVAL = float(os.environ.get('READY_DB_CHECK_INTERVAL', '10'))
+# Requests in flight per process at which /ready/ reports 503 (0 = no limit)
+READY_MAX_IN_FLIGHT = int(os.environ.get('READY_MAX_IN_FLIGHT', '0'))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'